@@ -0,0 +1,216 @@
+"""Signal-transition alerts for the Sniper watchlist.
+
+AlertEngine listens to the shared MarketRefresher. Each refresh hands it the
+just-fetched rows of the tickers on active sessions' watchlists (holdings are
+not alerted); only tickers whose price moved (or whose new signal is still
+being debounced) are re-classified, so the cost follows the number of changed
+tickers, not the universe. An event is emitted when a ticker's confirmed
+signal changes into one of `targets` (IN ZONE / PROFIT by default):
+
+  hysteresis  the current signal's region is widened by `hysteresis` (in
+              Diff S1 terms) so a price hovering on the 0% / 2% ALERT edges
+              does not flip back and forth
+  debounce    a new signal must be seen on `debounce` consecutive evaluations
+              before it is confirmed
+
+Sinks receive lists of event dicts: LogSink (JSON lines), WebhookSink (HTTP
+POST from a background thread) and FeedSink (in-app list). Configured from the
+environment by alerts_from_env():
+
+    SNIPER_ALERT_LOG       JSON-lines file (default DATA_DIR/alerts.jsonl)
+    SNIPER_ALERT_WEBHOOK   URL to POST events to (off when unset)
+
+Run a local stub that prints every webhook call:
+
+    python alerts.py --listen 8765
+    SNIPER_ALERT_WEBHOOK=http://127.0.0.1:8765/ streamlit run app.py
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import numpy as np
+
+import market_store
+from signals import ALERT_BAND, PRB_TIERS, SIGNAL_ALERT, SIGNAL_IN_ZONE, SIGNAL_PROFIT, SIGNAL_WAIT
+
+ALERT_TARGETS = (SIGNAL_IN_ZONE, SIGNAL_PROFIT)
+HYSTERESIS = 0.005
+DEBOUNCE = 2
+
+
+def classify_sticky(price, diff_s1, sell1, current, alert_band=ALERT_BAND, hysteresis=HYSTERESIS):
+    """signals.classify with each row's boundaries shifted `hysteresis` in favour of its current signal."""
+    price, diff_s1, sell1 = np.asarray(price), np.asarray(diff_s1), np.asarray(sell1)
+    current = np.asarray(current, dtype=object)
+    zone_edge = np.select([current == SIGNAL_IN_ZONE, current == SIGNAL_ALERT], [hysteresis, -hysteresis], 0.0)
+    alert_edge = alert_band + np.select([current == SIGNAL_ALERT, current == SIGNAL_WAIT], [hysteresis, -hysteresis], 0.0)
+    profit_level = sell1 * np.where(current == SIGNAL_PROFIT, 1 - hysteresis, 1.0)
+    return np.select(
+        [(diff_s1 < zone_edge) & (price > 0),
+         (diff_s1 >= zone_edge) & (diff_s1 <= alert_edge) & (price > 0),
+         price >= profit_level],
+        [SIGNAL_IN_ZONE, SIGNAL_ALERT, SIGNAL_PROFIT],
+        default=SIGNAL_WAIT,
+    )
+
+
+class AlertEngine:
+    def __init__(self, sinks=(), targets=ALERT_TARGETS, alert_band=ALERT_BAND, hysteresis=HYSTERESIS,
+                 debounce=DEBOUNCE, tiers=PRB_TIERS):
+        self.sinks = list(sinks)
+        self.targets = set(targets)
+        self.alert_band = alert_band
+        self.hysteresis = hysteresis
+        self.debounce = debounce
+        self.tiers = tiers
+        self.feed = next((sink for sink in self.sinks if isinstance(sink, FeedSink)), None)
+        # ticker -> [confirmed signal, last price, pending signal, pending count]
+        self._state = {}
+        self._lock = threading.Lock()
+        self.counters = {"rows": 0, "evaluated": 0, "events": 0}
+
+    def on_rows(self, rows):
+        """Refresher listener: {ticker: indicator row} just fetched."""
+        with self._lock:
+            # Price moved, or a pending signal still waits for its debounce confirmation.
+            changed = [t for t, row in rows.items() if row["Price"] and (
+                t not in self._state or self._state[t][1] != row["Price"] or self._state[t][2] is not None)]
+            self.counters["rows"] += len(rows)
+            self.counters["evaluated"] += len(changed)
+            if not changed:
+                return []
+            events = self._evaluate(changed, rows)
+        if events:
+            for sink in self.sinks:
+                try:
+                    sink.emit(events)
+                except Exception:
+                    pass
+        return events
+
+    def _evaluate(self, tickers, rows):
+        price = np.array([rows[t]["Price"] for t in tickers], dtype="float64")
+        buy1 = np.array([rows[t]["EMA50"] for t in tickers], dtype="float64")
+        sell1 = np.array([rows[t]["Sell1"] for t in tickers], dtype="float64")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            diff_s1 = np.where(buy1 > 0, (price - buy1) / buy1, 9.99)
+        current = [self._state[t][0] if t in self._state else None for t in tickers]
+        candidate = classify_sticky(price, diff_s1, sell1, current, self.alert_band, self.hysteresis).tolist()
+
+        events, now = [], time.time()
+        for i, ticker in enumerate(tickers):
+            state = self._state.get(ticker)
+            if state is None:
+                # First sighting sets the baseline silently.
+                self._state[ticker] = [candidate[i], price[i], None, 0]
+                continue
+            state[1] = price[i]
+            if candidate[i] == state[0]:
+                state[2], state[3] = None, 0
+                continue
+            state[3] = state[3] + 1 if candidate[i] == state[2] else 1
+            state[2] = candidate[i]
+            if state[3] < self.debounce:
+                continue
+            previous, state[0], state[2], state[3] = state[0], candidate[i], None, 0
+            if state[0] in self.targets:
+                events.append({
+                    "time": now, "ticker": ticker, "tier": self.tiers.get(ticker, "-"),
+                    "from": previous, "to": state[0], "price": float(price[i]), "diff_s1": float(diff_s1[i]),
+                    "sell1": float(sell1[i]),
+                })
+        self.counters["events"] += len(events)
+        return events
+
+
+class LogSink:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def emit(self, events):
+        with self._lock, open(self.path, "a") as f:
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+
+
+class WebhookSink:
+    """POSTs each batch of events as JSON from a worker thread, so a slow endpoint never blocks refreshes."""
+
+    def __init__(self, url, timeout=5.0):
+        self.url = url
+        self.timeout = timeout
+        self.sent = self.failed = 0
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name="alert-webhook", daemon=True).start()
+
+    def emit(self, events):
+        self._queue.put(events)
+
+    def _run(self):
+        while True:
+            events = self._queue.get()
+            request = urllib.request.Request(self.url, data=json.dumps({"events": events}).encode(),
+                                             headers={"Content-Type": "application/json"}, method="POST")
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout):
+                    self.sent += len(events)
+            except Exception:
+                self.failed += len(events)
+            finally:
+                self._queue.task_done()
+
+
+class FeedSink:
+    """Most recent events, newest first, for the dashboard."""
+
+    def __init__(self, max_events=200):
+        self._events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+
+    def emit(self, events):
+        with self._lock:
+            self._events.extend(events)
+
+    def latest(self, n=50):
+        with self._lock:
+            return list(self._events)[::-1][:n]
+
+
+def alerts_from_env():
+    """AlertEngine with a LogSink, a FeedSink (engine.feed) and, if configured, a WebhookSink."""
+    sinks = [LogSink(os.environ.get("SNIPER_ALERT_LOG", os.path.join(market_store.DATA_DIR, "alerts.jsonl"))), FeedSink()]
+    url = os.environ.get("SNIPER_ALERT_WEBHOOK")
+    if url:
+        sinks.append(WebhookSink(url))
+    return AlertEngine(sinks)
+
+
+def serve_stub(port):
+    """Local webhook receiver that prints every event it gets."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            for event in body.get("events", []):
+                print(f"{event['ticker']:<8} {event['from']} -> {event['to']} @ {event['price']:.2f}", flush=True)
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    HTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub for SNIPER_ALERT_WEBHOOK")
+    parser.add_argument("--listen", type=int, default=8765, help="port to listen on (127.0.0.1)")
+    serve_stub(parser.parse_args().listen)
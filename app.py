@@ -1,11 +1,36 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
+import json
+import uuid
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import plotly.graph_objects as go
+from alerts import alerts_from_env
+from market_store import BarStore
+from market_data import QUOTE_TTL, SNAPSHOT_TTL, MarketPipeline
+from prefetch import MarketRefresher
+from providers import provider_from_env
+from risk import HEATMAP_MAX, RiskModel, portfolio_risk
+from market_cache import TickerCache
+from perf import RunTimer, flatten, publish
+from portfolio_store import DEFAULT_PORTFOLIO, PortfolioStore, book_key
+from signals import PRB_TIERS, build_portfolio, build_watchlist
+from tables import (HOLDINGS_COLUMNS, PAGE_SIZES, STYLE_ROW_LIMIT, WATCHLIST_DISPLAY, filter_signals, page_count,
+                    paginate, style_holdings, style_watchlist, use_styler)
 
 # --- 1. ตั้งค่าหน้าเว็บ ---
 st.set_page_config(page_title="Sniper Portfolio & Watchlist", page_icon="🔭", layout="wide")
+timer = RunTimer()
+st.session_state._app_run = True
+# Live fragments (section 8) re-read the shared market snapshot this often.
+LIVE_REFRESH = timedelta(seconds=QUOTE_TTL)
+
+
+def log_run(run_timer):
+    run_log = st.session_state.setdefault('perf_log', [])
+    run_log.append(publish(run_timer))
+    del run_log[:-200]
+
 
 # --- CSS ปรับแต่ง (Big Font Edition 🔍) ---
 st.markdown("""
@@ -41,26 +66,29 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- 2. Initialize Session State (Sniper Default Data) ---
+# Books (portfolio lots, watchlist, note, cash) live in the SQLite store and are
+# loaded once per session; the defaults below only seed an empty store.
 
 # 2.1 Portfolio Data (AAPL, PLTR, TSM, LLY)
-if 'portfolio' not in st.session_state:
-    st.session_state.portfolio = [
-        {"Ticker": "AAPL", "Category": "Growth", "Avg Cost": 240.2191, "Qty": 0.6695555},
-        {"Ticker": "PLTR", "Category": "Growth", "Avg Cost": 170.1280, "Qty": 0.5868523},
-        {"Ticker": "TSM",  "Category": "Growth", "Avg Cost": 281.3780, "Qty": 0.3548252},
-        {"Ticker": "LLY",  "Category": "Defensive", "Avg Cost": 908.8900, "Qty": 0.0856869},
-    ]
+DEFAULT_LOTS = [
+    {"Ticker": "AAPL", "Category": "Growth", "Avg Cost": 240.2191, "Qty": 0.6695555},
+    {"Ticker": "PLTR", "Category": "Growth", "Avg Cost": 170.1280, "Qty": 0.5868523},
+    {"Ticker": "TSM",  "Category": "Growth", "Avg Cost": 281.3780, "Qty": 0.3548252},
+    {"Ticker": "LLY",  "Category": "Defensive", "Avg Cost": 908.8900, "Qty": 0.0856869},
+]
 
 # 2.2 Watchlist Data
-if 'watchlist' not in st.session_state:
-    st.session_state.watchlist = [
-        "AMZN", "NVDA", "V", "VOO", "GOOGL", "META", "MSFT", "TSLA", 
-        "WBD", "AMD", "AVGO", "IREN", "RKLB", "UBER", "CDNS", "WM"
-    ]
-
-# 2.3 Weekly Note Data
-if 'weekly_note' not in st.session_state:
-    st.session_state.weekly_note = """* **วันอังคาร 16 ธ.ค.: "วัดชีพจรผู้บริโภค"**
+DEFAULT_WATCHLIST = [
+    "AMZN", "NVDA", "V", "VOO", "GOOGL", "META", "MSFT", "TSLA", 
+    "WBD", "AMD", "AVGO", "IREN", "RKLB", "UBER", "CDNS", "WM"
+]
+
+# 2.3 Session ID (used by the shared market data refresher)
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+# 2.4 Weekly Note Data
+DEFAULT_NOTE = """* **วันอังคาร 16 ธ.ค.: "วัดชีพจรผู้บริโภค"**
     * **AMZN & V:** ถ้า Retail ต่ำกว่า +0.3% หรือ Nonfarm แย่ = ลบ
 * **วันพุธ 17 ธ.ค.: "ชี้ชะตา AI (ภาค Hardware)"**
     * **Event:** งบ **Micron (MU)** 🚨 *Highlight*
@@ -68,14 +96,65 @@ if 'weekly_note' not in st.session_state:
 * **วันพฤหัส 18 ธ.ค.: "เงินเฟ้อ & AI (ภาคใช้งาน)"**
     * **CPI > 3.1%:** เงินเฟ้อมา → Tech (NVDA/AMZN) ร่วงก่อน"""
 
+# Default Cash for Sniper Port = 400
+DEFAULT_CASH = 400.00
+
+
+# 2.5 Persistent Books
+@st.cache_resource
+def get_portfolio_store():
+    store = PortfolioStore()
+    if not store.names():
+        store.create(DEFAULT_PORTFOLIO, {"portfolio": DEFAULT_LOTS, "watchlist": DEFAULT_WATCHLIST,
+                                         "note": DEFAULT_NOTE, "cash": DEFAULT_CASH})
+    return store
+
+
+portfolio_store = get_portfolio_store()
+
+
+def open_book(name):
+    book = portfolio_store.load(name)
+    # The editor widget keeps its own text. Drop it, so it shows the loaded note,
+    # when it belongs to another book or holds no unsaved edits.
+    if name != st.session_state.get('book_name') or \
+            st.session_state.get('note_editor') == st.session_state.get('note_base'):
+        st.session_state.pop('note_editor', None)
+    st.session_state.book_name = name
+    st.session_state.book_version = book["version"]
+    st.session_state.portfolio = book["portfolio"]
+    st.session_state.watchlist = book["watchlist"]
+    st.session_state.weekly_note = book["note"]
+    st.session_state.cash_balance = book["cash"]
+
+
+def edit_book(change):
+    """Apply change(book) to the stored book (not this session's copy), so edits from other sessions are kept.
+
+    The session's copy is reloaded at the start of the next run.
+    """
+    book = portfolio_store.update(st.session_state.book_name, change)
+    st.session_state.book_version = None
+    return book
+
+
+def set_cash():
+    edit_book(lambda book: book.update(cash=st.session_state.cash_balance))
+
+
+# Each run picks up edits other sessions made to the open book.
+if 'book_name' not in st.session_state:
+    names = portfolio_store.names()
+    open_book(DEFAULT_PORTFOLIO if DEFAULT_PORTFOLIO in names else names[0])
+elif portfolio_store.version(st.session_state.book_name) != st.session_state.book_version:
+    open_book(st.session_state.book_name)
+
 # --- 3. Sidebar Settings & Management ---
-with st.sidebar:
-    st.header("💼 Wallet & Management")
-    # Default Cash for Sniper Port = 400
-    cash_balance_usd = st.number_input("Cash Flow ($)", value=400.00, step=10.0, format="%.2f")
-    
-    st.divider()
-    
+# The management forms are a fragment: picking tabs, typing and selecting only
+# rerun the forms. A change that alters holdings or the watchlist reruns the
+# app, where the shared frames (section 6) rebuild only what it touched.
+@st.fragment
+def manage_assets():
     tab_add, tab_remove = st.tabs(["➕ Add Asset", "🗑️ Remove/Sell"])
     
     with tab_add:
@@ -87,11 +166,14 @@ with st.sidebar:
             p_cat = st.selectbox("Category", ["Growth", "Defensive"])
             if st.form_submit_button("Add Position"):
                 if p_ticker:
-                    st.session_state.portfolio.append({
-                        "Ticker": p_ticker, "Category": p_cat, "Avg Cost": p_cost, "Qty": p_qty
-                    })
-                    if p_ticker in st.session_state.watchlist:
-                        st.session_state.watchlist.remove(p_ticker)
+                    def add_position(book):
+                        book["portfolio"].append({
+                            "Ticker": p_ticker, "Category": p_cat, "Avg Cost": p_cost, "Qty": p_qty
+                        })
+                        if p_ticker in book["watchlist"]:
+                            book["watchlist"].remove(p_ticker)
+
+                    edit_book(add_position)
                     st.success(f"Added {p_ticker}!")
                     st.rerun()
 
@@ -100,7 +182,12 @@ with st.sidebar:
             w_ticker = st.text_input("Ticker").upper()
             if st.form_submit_button("Add Watchlist"):
                 if w_ticker and w_ticker not in st.session_state.watchlist:
-                    st.session_state.watchlist.append(w_ticker)
+                    def add_watch(book):
+                        if w_ticker in book["watchlist"]:
+                            return False
+                        book["watchlist"].append(w_ticker)
+
+                    edit_book(add_watch)
                     st.success(f"Added {w_ticker}!")
                     st.rerun()
 
@@ -111,7 +198,8 @@ with st.sidebar:
             to_remove = st.selectbox("Select Position to Remove", current_holdings)
             if st.button("🗑️ Confirm Remove Position"):
                 ticker_to_remove = to_remove.split(" ")[0]
-                st.session_state.portfolio = [x for x in st.session_state.portfolio if x['Ticker'] != ticker_to_remove]
+                edit_book(lambda book: book.update(
+                    portfolio=[x for x in book["portfolio"] if x['Ticker'] != ticker_to_remove]))
                 st.warning(f"Removed {ticker_to_remove} from Portfolio.")
                 st.rerun()
         else:
@@ -122,21 +210,46 @@ with st.sidebar:
         if st.session_state.watchlist:
             w_remove = st.selectbox("Select Ticker", st.session_state.watchlist)
             if st.button("🗑️ Confirm Remove Watchlist"):
-                st.session_state.watchlist.remove(w_remove)
+                def remove_watch(book):
+                    if w_remove not in book["watchlist"]:
+                        return False
+                    book["watchlist"].remove(w_remove)
+
+                edit_book(remove_watch)
                 st.warning(f"Removed {w_remove}.")
                 st.rerun()
 
+
+with st.sidebar:
+    st.header("💼 Wallet & Management")
+    book_names = portfolio_store.names()
+    if st.session_state.get('book_select') not in book_names:
+        st.session_state.book_select = st.session_state.book_name
+    st.selectbox("📂 Portfolio", book_names, key="book_select",
+                 on_change=lambda: open_book(st.session_state.book_select))
+    with st.expander("💾 Save as New Portfolio"):
+        with st.form("save_as", clear_on_submit=True):
+            new_name = st.text_input("Portfolio Name").strip()
+            if st.form_submit_button("Save Copy") and new_name:
+                if portfolio_store.create(new_name, portfolio_store.load(st.session_state.book_name)):
+                    open_book(new_name)
+                    st.session_state.pop('book_select', None)
+                    st.rerun()
+                st.error(f"A portfolio named {new_name} already exists. Choose another name.")
+    cash_balance_usd = st.number_input("Cash Flow ($)", step=10.0, format="%.2f", key="cash_balance", on_change=set_cash)
+    
+    st.divider()
+    manage_assets()
+
+    st.divider()
+    st.toggle("🩺 Diagnostics", key="show_diagnostics", help="Per-stage timing of each rerun")
+    st.selectbox("Table Rendering", ["Auto", "Styled", "Fast"], key="table_mode",
+                 help=f"Auto uses colored tables up to {STYLE_ROW_LIMIT} rows and native number formats above")
+
+timer.lap("sidebar")
+
 # --- 4. PRB Tier Mapping ---
-prb_tiers = {
-    "NVDA": "S+", "AAPL": "S+", "MSFT": "S+", "GOOGL": "S+", "TSM": "S+", "ASML": "S+",
-    "AMD": "S", "PLTR": "S", "AMZN": "S", "META": "S", "AVGO": "S", "CRWD": "S", "SMH": "S", "QQQ": "ETF",
-    "TSLA": "A+", "V": "A+", "MA": "A+", "LLY": "A+", "JNJ": "A+", "BRK.B": "A+", "PG": "B+", "KO": "B+",
-    "NFLX": "A", "WM": "A", "WMT": "A", "CEG": "A", "NET": "A", "PANW": "A", "SCHD": "A", "CDNS": "S",
-    "ISRG": "B+", "RKLB": "B+", "TMDX": "B+", "IREN": "B+", "MELI": "B+", "ASTS": "B+", "EOSE": "B+",
-    "ADBE": "B", "UBER": "B", "HOOD": "B", "DASH": "B", "BABA": "B", "CRWV": "B", "MU": "B", "PATH": "C",
-    "TTD": "C", "LULU": "C", "CMG": "C", "DUOL": "C", "PDD": "C", "ORCL": "C", "WBD": "Hold",
-    "VOO": "ETF", "QQQM": "ETF"
-}
+prb_tiers = PRB_TIERS
 
 # --- 5. Data Fetching ---
 try:
@@ -145,149 +258,376 @@ try:
 
     port_tickers = [item['Ticker'] for item in st.session_state.portfolio]
     watchlist_tickers = st.session_state.watchlist
-    all_tickers = list(set(port_tickers + watchlist_tickers))
+    all_tickers = sorted(set(port_tickers + watchlist_tickers))
+
+    @st.cache_resource
+    def get_market_refresher():
+        return MarketRefresher(MarketPipeline(BarStore(provider=provider_from_env())))
+
+    # Return/covariance matrices change only with new daily bars: cached per bar
+    # store version, so quote refreshes and position edits reuse them.
+    @st.cache_resource(max_entries=8)
+    def get_risk_model(_store, history_version, tickers):
+        return RiskModel(_store.history(list(tickers)), list(tickers))
+
+    # One alert engine per process, fed by the refresher's background fetches.
+    # Alerts cover watchlist names only; holdings are refreshed but not classified.
+    @st.cache_resource
+    def get_alert_engine(_refresher):
+        engine = alerts_from_env()
+
+        def on_rows(rows):
+            watched = _refresher.watched_tickers()
+            return engine.on_rows({t: row for t, row in rows.items() if t in watched})
+
+        _refresher.listeners.append(on_rows)
+        return engine
+
+    refresher = get_market_refresher()
+    alert_engine = get_alert_engine(refresher)
+    refresher.register(st.session_state.session_id, all_tickers, watchlist_tickers)
+
+    # The live fragments never rerun the whole script, so an open page nobody
+    # touches renews its registration here; otherwise the refresher drops it
+    # after SESSION_TTL and its tickers (and watchlist alerts) stop updating.
+    @st.fragment(run_every=LIVE_REFRESH)
+    def session_heartbeat():
+        watchlist = st.session_state.watchlist
+        tickers = sorted(set([item['Ticker'] for item in st.session_state.portfolio] + watchlist))
+        refresher.register(st.session_state.session_id, tickers, watchlist)
+
+    session_heartbeat()
+
+    stats_before = refresher.pipeline.stats()
+    if st.button('🔄 Refresh Data (Real-time)'):
+        refresher.pipeline.clear_quotes()
+        with st.spinner("Fetching Real-time Market Data..."):
+            refresher.refresh(all_tickers)
+
+    cold_tickers = refresher.missing(all_tickers)
+    if cold_tickers:
+        with st.spinner("Fetching Real-time Market Data..."):
+            snapshot = refresher.get(all_tickers)
+    else:
+        snapshot = refresher.get(all_tickers)
+    cache_stats = refresher.pipeline.stats()
+    provider = refresher.pipeline.store.provider
+    fetch_errors = provider.errors(all_tickers) if hasattr(provider, "errors") else {}
+    timer.lap("fetch", tickers=len(all_tickers), hits=len(all_tickers) - len(cold_tickers), misses=len(cold_tickers),
+              errors=len(fetch_errors))
+    for stage, seconds in cache_stats['timing'].items():
+        timer.record(stage, seconds - stats_before['timing'][stage], parent="fetch")
+    for tier in ("quotes", "snapshots"):
+        for counter in ("hits", "misses", "evictions"):
+            timer.info[f"{tier}_{counter}"] = cache_stats[tier][counter] - stats_before[tier][counter]
+    for counter, value in cache_stats['states'].items():
+        timer.info[f"states_{counter}"] = value - stats_before['states'][counter]
+    timer.info.update(snapshot_version=snapshot.version, snapshot_tickers=len(snapshot), snapshot_kb=snapshot.nbytes() / 1024)
 
-    @st.cache_data(ttl=60, show_spinner="Fetching Real-time Market Data...") 
-    def get_realtime_data(tickers_list):
-        data_dict = {}
+    # --- 6. Data Processing ---
+    # Derived tables are shared by every session: cached under a content hash of
+    # the lots / watchlist, so identical or unchanged books reuse them and
+    # fragments rerunning on their own are cheap. Each entry holds the table for
+    # one snapshot version and is replaced when the snapshot moves on, so a book
+    # never keeps more than one table; the LRU bound covers books no longer open.
+    @st.cache_resource
+    def get_table_cache():
+        return TickerCache(max_size=64, ttl=SNAPSHOT_TTL)
+
+    table_cache = get_table_cache()
+
+    def shared_table(kind, items, snap, build):
+        key = f"{kind}:{book_key(items)}"
+        return table_cache.get_many([key], lambda missing: {key: (snap.version, build())},
+                                    lambda _, cached: cached[0] == snap.version)[key][1]
+
+    def portfolio_frame():
+        snap, portfolio = refresher.snapshot, st.session_state.portfolio
+        # A ticker held in several lots is looked up once.
+        tickers = list(dict.fromkeys(p['Ticker'] for p in portfolio))
+        return shared_table("portfolio", portfolio, snap, lambda: build_portfolio(portfolio, snap.frame(tickers)))
+
+    def watchlist_frame():
+        snap, watchlist = refresher.snapshot, st.session_state.watchlist
+        return shared_table("watchlist", watchlist, snap,
+                            lambda: build_watchlist(watchlist, snap.frame(watchlist), prb_tiers))
+
+    def portfolio_totals(df, cash_balance_usd):
+        if not df.empty:
+            total_value = df['Value USD'].sum() + cash_balance_usd
+            total_gain = df['Total Gain USD'].sum()
+            total_day_change = df['Day Change USD'].sum()
+            total_invested = df['Total Cost'].sum()
+        else:
+            total_value = cash_balance_usd
+            total_gain = 0
+            total_day_change = 0
+            total_invested = 0
+        return total_value, total_gain, total_day_change, total_invested
+
+    @contextmanager
+    def fragment_timer(name):
+        """The page timer during an app run; a fragment-only rerun is timed and logged on its own."""
+        if st.session_state.get('_app_run'):
+            yield timer
+            return
+        own = RunTimer()
+        own.info['fragment'] = name
         try:
-            if not tickers_list: return {}
-            df_hist = yf.download(tickers_list, period="2y", group_by='ticker', auto_adjust=True, threads=True)
-        except Exception as e:
-            return {}
-
-        for ticker in tickers_list:
-            try:
-                if len(tickers_list) > 1:
-                    df_t = df_hist[ticker].copy()
-                else:
-                    df_t = df_hist.copy()
-
-                df_t = df_t.dropna()
-                if df_t.empty or len(df_t) < 200:
-                    data_dict[ticker] = {"Price": 0, "PrevClose": 0, "EMA50": 0, "EMA200": 0, "RSI": 50, "Sell1": 0, "Sell2": 0}
-                    continue
-
-                current_price = df_t['Close'].iloc[-1]
-                prev_close = df_t['Close'].iloc[-2]
-                
-                df_t['EMA50'] = df_t['Close'].ewm(span=50, adjust=False).mean()
-                df_t['EMA200'] = df_t['Close'].ewm(span=200, adjust=False).mean()
-                
-                delta = df_t['Close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                rs = gain / loss
-                df_t['RSI'] = 100 - (100 / (1 + rs))
-
-                df_t['SMA20'] = df_t['Close'].rolling(window=20).mean()
-                df_t['STD20'] = df_t['Close'].rolling(window=20).std()
-                sell_r1 = (df_t['SMA20'] + (df_t['STD20'] * 2)).iloc[-1] 
-                sell_r2 = df_t['Close'].iloc[-252:].max()
-
-                data_dict[ticker] = {
-                    "Price": current_price, "PrevClose": prev_close,
-                    "EMA50": df_t['EMA50'].iloc[-1], "EMA200": df_t['EMA200'].iloc[-1], 
-                    "RSI": df_t['RSI'].iloc[-1], "Sell1": sell_r1, "Sell2": sell_r2
-                }
-            except:
-                data_dict[ticker] = {"Price": 0, "PrevClose": 0, "EMA50": 0, "EMA200": 0, "RSI": 50, "Sell1": 0, "Sell2": 0}
-                
-        return data_dict
+            yield own
+        finally:
+            log_run(own)
 
-    if st.button('🔄 Refresh Data (Real-time)'):
-        st.cache_data.clear()
-        st.rerun()
+    df = portfolio_frame()
+    timer.lap("portfolio", rows=len(df))
 
-    market_data = get_realtime_data(all_tickers)
+    # --- 7. Styling & Column Formats ---
+    holdings_config = {
+        "Current Price": "Price", "% P/L": "% Total", "Value USD": "Value ($)", "Total Gain USD": "Total Gain ($)",
+        "Buy Lv.1": "Buy Lv.1", "Sell Lv.1": "Sell Lv.1", "Upside": st.column_config.Column("Upside", help="Gap to Sell Lv.1")
+    }
+    holdings_config_fast = {
+        "Qty": st.column_config.NumberColumn("Qty", format="%.4f"),
+        "Avg Cost": st.column_config.NumberColumn("Avg Cost", format="$%.2f"),
+        "Current Price": st.column_config.NumberColumn("Price", format="$%.2f"),
+        "% P/L": st.column_config.NumberColumn("% Total", format="percent"),
+        "Value USD": st.column_config.NumberColumn("Value ($)", format="dollar"),
+        "Total Gain USD": st.column_config.NumberColumn("Total Gain ($)", format="dollar"),
+        "Upside": st.column_config.NumberColumn("Upside", format="percent", help="Gap to Sell Lv.1"),
+        "Diff S1": st.column_config.NumberColumn("Diff S1", format="percent"),
+        "Buy Lv.1": st.column_config.NumberColumn("Buy Lv.1", format="$%.0f"),
+        "Sell Lv.1": st.column_config.NumberColumn("Sell Lv.1", format="$%.0f"),
+    }
+    watchlist_config = {
+        "Display Signal": st.column_config.Column("Status", width="medium"),
+        "Tier": st.column_config.Column("Tier", width="small"),
+        "Ticker": st.column_config.Column("Symbol", width="small"),
+        "Price": st.column_config.Column("Price", width="small"),
+        "% Day": st.column_config.Column("% Day", width="small"),
+        "Diff S1": st.column_config.Column("Diff S1", help="Distance to EMA 50"),
+        "Upside": st.column_config.Column("Upside", help="Gap to Sell Lv.1"),
+        "RSI": st.column_config.Column("RSI", help="RSI (14)"),
+        "Buy Lv.1": st.column_config.Column("Buy (EMA50)"),
+        "Buy Lv.2": st.column_config.Column("Buy (EMA200)"),
+        "Sell Lv.1": st.column_config.Column("Sell (R1)"),
+        "Sell Lv.2": st.column_config.Column("Sell (R2)"),
+    }
+    watchlist_config_fast = {
+        **watchlist_config,
+        "Price": st.column_config.NumberColumn("Price", format="$%.2f", width="small"),
+        "% Day": st.column_config.NumberColumn("% Day", format="percent", width="small"),
+        "Diff S1": st.column_config.NumberColumn("Diff S1", format="percent", help="Distance to EMA 50"),
+        "Upside": st.column_config.NumberColumn("Upside", format="percent", help="Gap to Sell Lv.1"),
+        "RSI": st.column_config.ProgressColumn("RSI", format="%.0f", min_value=0, max_value=100, help="RSI (14)"),
+        "Buy Lv.1": st.column_config.NumberColumn("Buy (EMA50)", format="$%.0f"),
+        "Buy Lv.2": st.column_config.NumberColumn("Buy (EMA200)", format="$%.0f"),
+        "Sell Lv.1": st.column_config.NumberColumn("Sell (R1)", format="$%.0f"),
+        "Sell Lv.2": st.column_config.NumberColumn("Sell (R2)", format="$%.0f"),
+    }
 
-    # --- 6. Data Processing ---
-    df = pd.DataFrame(st.session_state.portfolio)
-    
-    if not df.empty:
-        df['Current Price'] = df['Ticker'].apply(lambda x: market_data.get(x, {}).get('Price', 0))
-        df['PrevClose'] = df['Ticker'].apply(lambda x: market_data.get(x, {}).get('PrevClose', 0))
+    def show_holdings(df_part):
+        if use_styler(st.session_state.get('table_mode', "Auto"), len(df_part)):
+            data, config = style_holdings(df_part), holdings_config
+        else:
+            data, config = df_part[HOLDINGS_COLUMNS], holdings_config_fast
+        st.dataframe(data, column_order=HOLDINGS_COLUMNS, column_config=config, hide_index=True, use_container_width=True)
+
+    # --- 8. UI Display ---
+    # KPI metrics, risk panel, allocation chart and each table are fragments that re-read the
+    # shared snapshot every LIVE_REFRESH; the notes editor reruns only itself.
+    @st.fragment(run_every=LIVE_REFRESH)
+    def kpi_metrics(cash_balance_usd):
+        with fragment_timer("kpi") as t:
+            total_value, total_gain, total_day_change, total_invested = portfolio_totals(portfolio_frame(), cash_balance_usd)
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("💰 Total Value (USD)", f"${total_value:,.2f}", f"≈฿{total_value*33:,.0f}")
+            c2.metric("🌊 Cash Flow", f"${cash_balance_usd:,.2f}", "Ready to Sniper")
+            c3.metric("📈 Unrealized G/L", f"${total_gain:,.2f}", f"Invested: ${total_invested:,.0f}")
+            c4.metric("📅 Day Change", f"${total_day_change:+.2f}", f"{(total_day_change/total_invested*100) if total_invested else 0:+.2f}%")
+            t.lap("kpi")
+
+    @st.fragment(run_every=LIVE_REFRESH)
+    def risk_panel(cash_balance_usd):
+        with fragment_timer("risk") as t:
+            df = portfolio_frame()
+            total_value = portfolio_totals(df, cash_balance_usd)[0]
+            holdings = list(dict.fromkeys(df['Ticker'])) if not df.empty else []
+            universe = holdings + [w for w in st.session_state.watchlist if w not in holdings]
+            store = refresher.pipeline.store
+            model = get_risk_model(store, store.version, tuple(universe[:max(HEATMAP_MAX, len(holdings))]))
+            values = df.groupby('Ticker')['Value USD'].sum().to_dict() if not df.empty else {}
+            risk = portfolio_risk(model, values, total_value)
+
+            r1, r2, r3 = st.columns(3)
+            r1.metric("📉 Volatility (Annual)", f"{risk['vol']:.1%}", f"≈${risk['vol'] * total_value:,.0f} / yr", delta_color="off")
+            r2.metric(f"⚠️ VaR {risk['level']:.0%} (1 Day)", f"${risk['var']:,.0f}", f"{risk['var'] / total_value if total_value else 0:.2%} of total", delta_color="off")
+            r3.metric(f"🔥 CVaR {risk['level']:.0%} (1 Day)", f"${risk['cvar']:,.0f}", f"{risk['cvar'] / total_value if total_value else 0:.2%} of total", delta_color="off")
+
+            col_contrib, col_corr = st.columns([1, 1])
+            with col_contrib:
+                contributions = risk['contributions']
+                if not contributions.empty:
+                    categories = df.drop_duplicates('Ticker').set_index('Ticker')['Category']
+                    contributions.insert(1, "Category", contributions['Ticker'].map(categories).to_numpy())
+                    by_category = contributions.groupby("Category")[["Weight", "Risk Share"]].sum()
+                    st.caption(" | ".join(f"{cat}: {row['Weight']:.0%} of value, {row['Risk Share']:.0%} of risk"
+                                          for cat, row in by_category.iterrows()))
+                    st.dataframe(contributions, hide_index=True, use_container_width=True, column_config={
+                        "Weight": st.column_config.NumberColumn("Weight", format="percent"),
+                        "Marginal Vol": st.column_config.NumberColumn("Marginal Vol", format="percent",
+                                                                      help="Change in portfolio volatility per unit of weight"),
+                        "Risk Share": st.column_config.ProgressColumn("Risk Share", format="percent", min_value=0, max_value=1,
+                                                                      help="Share of portfolio variance"),
+                    })
+                else:
+                    st.info("No holdings with enough history.")
+                if model.excluded:
+                    st.caption(f"Not enough history: {', '.join(model.excluded)}")
+            with col_corr:
+                fig_corr = go.Figure(data=go.Heatmap(
+                    z=model.corr.to_numpy(), x=model.tickers, y=model.tickers, zmin=-1, zmax=1, colorscale="RdBu"
+                ))
+                fig_corr.update_layout(margin=dict(t=20, b=20, l=20, r=20), height=400, yaxis=dict(autorange="reversed"))
+                st.plotly_chart(fig_corr, use_container_width=True)
+                if len(universe) > len(model.tickers) + len(model.excluded):
+                    st.caption(f"Correlation of the first {len(model.tickers) + len(model.excluded)} of {len(universe)} tickers "
+                               f"(holdings, then watchlist), last {len(model.returns)} daily returns")
+            t.lap("risk", tickers=len(model.tickers))
+
+    def save_note():
+        # note_base is the note the editor was loaded from, not the latest reload.
+        base, text = st.session_state.note_base, st.session_state.note_editor
+
+        def set_note(book):
+            # Keep a note another session changed since the editor loaded it.
+            if book["note"] != base:
+                return False
+            book["note"] = text
+
+        book = edit_book(set_note)
+        st.session_state.weekly_note = book["note"]
+        st.session_state.note_saved = book["note"] == text
+        # Saving again after a refusal overwrites the note the user has now seen.
+        st.session_state.note_base = book["note"]
+
+    # Saving runs as a callback before the fragment redraws, so the View tab
+    # shows the new note without another rerun.
+    @st.fragment
+    def weekly_notes():
+        tab_view, tab_edit = st.tabs(["👁️ View", "✏️ Edit"])
         
-        df['Value USD'] = df['Qty'] * df['Current Price']
-        df['Total Cost'] = df['Qty'] * df['Avg Cost']
-        df['Total Gain USD'] = df['Value USD'] - df['Total Cost']
-        df['% P/L'] = ((df['Current Price'] - df['Avg Cost']) / df['Avg Cost']) 
-        df['Day Change USD'] = (df['Current Price'] - df['PrevClose']) * df['Qty']
-        df['%Day Change'] = ((df['Current Price'] - df['PrevClose']) / df['PrevClose']) if df['PrevClose'].sum() > 0 else 0
-
-        def get_levels_series(ticker, price):
-            data = market_data.get(ticker, {})
-            buy1 = data.get('EMA50', 0)
-            buy2 = data.get('EMA200', 0)
-            sell1 = data.get('Sell1', 0)
-            sell2 = data.get('Sell2', 0)
-            
-            diff_s1 = (price - buy1) / buy1 if buy1 > 0 else 0
-            upside = (sell1 - price) / price if price > 0 else 0
+        with tab_view:
+            st.markdown(st.session_state.weekly_note)
+        
+        with tab_edit:
+            st.info("คุณสามารถแก้ไข เพิ่ม หรือลบข้อความวิเคราะห์ได้ที่นี่ครับ")
+            if 'note_editor' not in st.session_state:
+                st.session_state.note_base = st.session_state.weekly_note
+            st.text_area("Note Editor:", value=st.session_state.weekly_note, height=250, key="note_editor")
+            st.button("💾 Save Notes", on_click=save_note)
+            note_saved = st.session_state.pop('note_saved', None)
+            if note_saved:
+                st.success("บันทึกข้อมูลเรียบร้อย!")
+            elif note_saved is False:
+                st.warning("The note was changed in another session and was not overwritten. "
+                           "The View tab shows the saved note; your text is still in the editor. Save again to replace it.")
+
+    @st.fragment(run_every=LIVE_REFRESH)
+    def allocation_chart(cash_balance_usd):
+        with fragment_timer("chart") as t:
+            df = portfolio_frame()
+            total_value = portfolio_totals(df, cash_balance_usd)[0]
+            if not df.empty:
+                labels = list(df['Ticker']) + ['CASH 💵']
+                values = list(df['Value USD']) + [cash_balance_usd]
+            else:
+                labels = ['CASH 💵']
+                values = [cash_balance_usd]
+
+            colors = ['#333333', '#1f77b4', '#d62728', '#2ca02c', '#ff7f0e', '#9467bd', '#8c564b', '#7f7f7f', '#bcbd22', '#17becf']
             
-            return pd.Series([buy1, buy2, sell1, sell2, diff_s1, upside], 
-                            index=['Buy Lv.1', 'Buy Lv.2', 'Sell Lv.1', 'Sell Lv.2', 'Diff S1', 'Upside'])
-
-        tech_cols = df.apply(lambda x: get_levels_series(x['Ticker'], x['Current Price']), axis=1)
-        df = pd.concat([df, tech_cols], axis=1)
-
-        total_value = df['Value USD'].sum() + cash_balance_usd
-        total_gain = df['Total Gain USD'].sum()
-        total_day_change = df['Day Change USD'].sum()
-        total_invested = df['Total Cost'].sum()
-    else:
-        total_value = cash_balance_usd
-        total_gain = 0
-        total_day_change = 0
-        total_invested = 0
-
-    # --- 7. Styling Functions ---
-    def color_text(val):
-        if isinstance(val, (int, float)): return 'color: #28a745' if val >= 0 else 'color: #dc3545'
-        return ''
-    
-    def color_diff_s1_logic(val):
-        if isinstance(val, (int, float)):
-            if val < 0: return 'color: #28a745; font-weight: bold;' 
-            elif 0 <= val <= 0.02: return 'color: #90EE90;' 
-            else: return 'color: #dc3545;' 
-        return ''
-
-    def color_rsi(val):
-        try:
-            v = float(val)
-            if v >= 70: return 'color: #dc3545; font-weight: bold;'
-            if v <= 30: return 'color: #28a745; font-weight: bold;'
-        except: pass
-        return ''
-
-    def format_arrow(val):
-        symbol = "⬆️" if val > 0 else "⬇️" if val < 0 else "➖"
-        return f"{val:+.2%} {symbol}"
-
-    def color_tier(val):
-        if val == "S+": return 'color: #ffd700; font-weight: bold;' 
-        if val == "S": return 'color: #c0c0c0; font-weight: bold;' 
-        if "A" in str(val): return 'color: #cd7f32; font-weight: bold;' 
-        return ''
-
-    def highlight_row(s):
-        try:
-            if "IN ZONE" in str(s['Signal']): return ['background-color: rgba(40, 167, 69, 0.4)'] * len(s)
-            elif "ALERT" in str(s['Signal']): return ['background-color: rgba(40, 167, 69, 0.2)'] * len(s)
-            elif "PROFIT" in str(s['Signal']): return ['background-color: rgba(220, 53, 69, 0.2)'] * len(s)
-        except: pass
-        return [''] * len(s)
+            fig_pie = go.Figure(data=[go.Pie(
+                labels=labels, values=values, hole=.5, marker_colors=colors, 
+                textinfo='label+percent', textposition='inside', textfont=dict(size=16, color='white')
+            )])
+            fig_pie.update_layout(
+                margin=dict(t=20, b=20, l=20, r=20), height=350, showlegend=True,
+                legend=dict(orientation="h", yanchor="top", y=-0.1, xanchor="center", x=0.5, font=dict(size=14)),
+                annotations=[dict(text=f'Total<br><b>${total_value:,.0f}</b>', x=0.5, y=0.5, font_size=24, showarrow=False)]
+            )
+            st.plotly_chart(fig_pie, use_container_width=True)
+            t.lap("chart")
+
+    @st.fragment(run_every=LIVE_REFRESH)
+    def holdings_table(category, empty_message):
+        with fragment_timer(f"table_{category.lower()}") as t:
+            df = portfolio_frame()
+            if not df.empty:
+                show_holdings(df[df['Category'] == category])
+            else:
+                st.info(empty_message)
+            t.lap(f"table_{category.lower()}", rows=len(df))
+
+    @st.fragment(run_every=LIVE_REFRESH)
+    def alert_feed():
+        events = alert_engine.feed.latest() if alert_engine.feed else []
+        with st.expander(f"🔔 Signal Alerts ({len(events)})", expanded=False):
+            if events:
+                df_events = pd.DataFrame(events)
+                df_events['time'] = pd.to_datetime(df_events['time'], unit="s") + timedelta(hours=7)
+                st.dataframe(df_events[["time", "ticker", "tier", "from", "to", "price", "diff_s1"]], hide_index=True,
+                             use_container_width=True, column_config={
+                                 "time": st.column_config.DatetimeColumn("Time (BKK)", format="D MMM HH:mm:ss"),
+                                 "price": st.column_config.NumberColumn("Price", format="$%.2f"),
+                                 "diff_s1": st.column_config.NumberColumn("Diff S1", format="percent"),
+                             })
+            else:
+                st.info("No signal changes yet. Tickers moving into IN ZONE or PROFIT show up here.")
+            counters = alert_engine.counters
+            st.caption(f"Re-evaluated {counters['evaluated']:,} of {counters['rows']:,} refreshed rows (price changed) | "
+                       f"{counters['events']:,} alerts")
+
+    @st.fragment(run_every=LIVE_REFRESH)
+    def watchlist_table():
+        with fragment_timer("watchlist") as t:
+            df_watch = watchlist_frame()
+            t.lap("watchlist", rows=len(df_watch))
+            if not df_watch.empty:
+                f1, f2, f3 = st.columns([3, 1, 1])
+                signal_filter = f1.multiselect("Signal", sorted(df_watch['Display Signal'].unique()), key="watch_signals",
+                                               placeholder="All signals")
+                page_size = f2.selectbox("Rows", PAGE_SIZES, index=1, key="watch_page_size")
+                df_visible = filter_signals(df_watch, signal_filter)
+                n_pages = page_count(len(df_visible), page_size)
+                if st.session_state.get('watch_page', 1) > n_pages:
+                    st.session_state.watch_page = n_pages
+                page = f3.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1, key="watch_page")
+                df_page = paginate(df_visible, page, page_size)
+
+                if use_styler(st.session_state.get('table_mode', "Auto"), len(df_page)):
+                    data, config = style_watchlist(df_page), watchlist_config
+                else:
+                    data, config = df_page[WATCHLIST_DISPLAY], watchlist_config_fast
+                st.dataframe(data, column_config=config, column_order=WATCHLIST_DISPLAY, hide_index=True, use_container_width=True)
+                st.caption(f"Showing {len(df_page)} of {len(df_visible)} ({len(df_watch)} total) | Page {page}/{n_pages}")
+            else:
+                st.info("Watchlist is empty.")
+            t.lap("watchlist_table", rows=len(df_watch))
 
-    # --- 8. UI Display ---
     st.title("🔭 Sniper Portfolio & Watchlist") 
-    st.caption(f"Last Update (BKK Time): {target_date_str} | Data Source: Yahoo Finance")
-
-    c1, c2, c3, c4 = st.columns(4)
-    c1.metric("💰 Total Value (USD)", f"${total_value:,.2f}", f"≈฿{total_value*33:,.0f}")
-    c2.metric("🌊 Cash Flow", f"${cash_balance_usd:,.2f}", "Ready to Sniper")
-    c3.metric("📈 Unrealized G/L", f"${total_gain:,.2f}", f"Invested: ${total_invested:,.0f}")
-    c4.metric("📅 Day Change", f"${total_day_change:+.2f}", f"{(total_day_change/total_invested*100) if total_invested else 0:+.2f}%")
+    quote_stats, snap_stats = cache_stats['quotes'], cache_stats['snapshots']
+    data_time = (datetime.utcfromtimestamp(refresher.last_refresh) + timedelta(hours=7)).strftime("%H:%M:%S") if refresher.last_refresh else "-"
+    st.caption(f"Last Update (BKK Time): {target_date_str} | Market Data As Of: {data_time} | Data Source: {provider.name} | "
+               f"Quotes: {quote_stats['hit_rate']:.0%} hit ({quote_stats['hits']} hit / {quote_stats['misses']} miss / {quote_stats['evictions']} evicted) | "
+               f"Daily Snapshot: {snap_stats['hit_rate']:.0%} hit ({snap_stats['misses']} rebuilt)")
+    if fetch_errors:
+        with st.expander(f"⚠️ {len(fetch_errors)} ticker(s) failed to update - showing last stored data", expanded=False):
+            st.dataframe(pd.DataFrame({"Ticker": list(fetch_errors), "Error": list(fetch_errors.values())}),
+                         hide_index=True, use_container_width=True)
+
+    kpi_metrics(cash_balance_usd)
+    with st.expander("🧮 Risk Analytics: Volatility, VaR/CVaR, Risk Contribution & Correlation", expanded=False):
+        risk_panel(cash_balance_usd)
 
     st.markdown("---")
 
@@ -319,41 +659,13 @@ try:
                 """)
         
         with st.expander("📅 Weekly Analysis & Notes : https://web.facebook.com/chaodoi.diary : ปฏิทินข้อมูลเศรษฐกิจที่สำคัญและการรายงานผลประกอบการที่น่าสนใจในสัปดาห์นี้", expanded=True):
-            tab_view, tab_edit = st.tabs(["👁️ View", "✏️ Edit"])
-            
-            with tab_view:
-                st.markdown(st.session_state.weekly_note)
-            
-            with tab_edit:
-                st.info("คุณสามารถแก้ไข เพิ่ม หรือลบข้อความวิเคราะห์ได้ที่นี่ครับ")
-                new_note = st.text_area("Note Editor:", value=st.session_state.weekly_note, height=250)
-                if st.button("💾 Save Notes"):
-                    st.session_state.weekly_note = new_note
-                    st.success("บันทึกข้อมูลเรียบร้อย!")
-                    st.rerun()
+            weekly_notes()
+
+    timer.lap("header")
 
     with col_mid_right:
         st.subheader("📊 Asset Allocation (Including Cash)")
-        
-        if not df.empty:
-            labels = list(df['Ticker']) + ['CASH 💵']
-            values = list(df['Value USD']) + [cash_balance_usd]
-        else:
-            labels = ['CASH 💵']
-            values = [cash_balance_usd]
-
-        colors = ['#333333', '#1f77b4', '#d62728', '#2ca02c', '#ff7f0e', '#9467bd', '#8c564b', '#7f7f7f', '#bcbd22', '#17becf']
-        
-        fig_pie = go.Figure(data=[go.Pie(
-            labels=labels, values=values, hole=.5, marker_colors=colors, 
-            textinfo='label+percent', textposition='inside', textfont=dict(size=16, color='white')
-        )])
-        fig_pie.update_layout(
-            margin=dict(t=20, b=20, l=20, r=20), height=350, showlegend=True,
-            legend=dict(orientation="h", yanchor="top", y=-0.1, xanchor="center", x=0.5, font=dict(size=14)),
-            annotations=[dict(text=f'Total<br><b>${total_value:,.0f}</b>', x=0.5, y=0.5, font_size=24, showarrow=False)]
-        )
-        st.plotly_chart(fig_pie, use_container_width=True)
+        allocation_chart(cash_balance_usd)
 
     st.markdown("---")
 
@@ -363,113 +675,46 @@ try:
     with col_bot_left:
         # Growth Engine
         st.subheader("🚀 Growth Engine") 
-        if not df.empty:
-            df_growth = df[df['Category'] == 'Growth'].copy()
-            st.dataframe(
-                df_growth.style.format({
-                    "Qty": "{:.4f}", "Avg Cost": "${:.2f}", "Total Cost": "${:,.2f}", "Current Price": "${:.2f}",
-                    "Diff S1": "{:+.1%}", "% P/L": format_arrow, "Value USD": "${:,.2f}", "Total Gain USD": "${:,.2f}",
-                    "Upside": "{:+.1%}", "Buy Lv.1": "${:.0f}", "Sell Lv.1": "${:.0f}"
-                })
-                .map(color_text, subset=['% P/L', 'Total Gain USD', 'Upside'])
-                .map(color_diff_s1_logic, subset=['Diff S1']),
-                column_order=["Ticker", "Qty", "Avg Cost", "Current Price", "% P/L", "Value USD", "Total Gain USD", "Upside", "Diff S1", "Buy Lv.1", "Sell Lv.1"],
-                column_config={
-                    "Current Price": "Price", "% P/L": "% Total", "Value USD": "Value ($)", "Total Gain USD": "Total Gain ($)",
-                    "Buy Lv.1": "Buy Lv.1", "Sell Lv.1": "Sell Lv.1", "Upside": st.column_config.Column("Upside", help="Gap to Sell Lv.1")
-                },
-                hide_index=True, use_container_width=True
-            )
-        else:
-            st.info("No Growth stocks.")
+        holdings_table("Growth", "No Growth stocks.")
 
         # Defensive Wall
         st.subheader("🛡️ Defensive Wall") 
-        if not df.empty:
-            df_defensive = df[df['Category'] == 'Defensive'].copy()
-            st.dataframe(
-                df_defensive.style.format({
-                    "Qty": "{:.4f}", "Avg Cost": "${:.2f}", "Total Cost": "${:,.2f}", "Current Price": "${:.2f}",
-                    "Diff S1": "{:+.1%}", "% P/L": format_arrow, "Value USD": "${:,.2f}", "Total Gain USD": "${:,.2f}",
-                    "Upside": "{:+.1%}", "Buy Lv.1": "${:.0f}", "Sell Lv.1": "${:.0f}"
-                })
-                .map(color_text, subset=['% P/L', 'Total Gain USD', 'Upside'])
-                .map(color_diff_s1_logic, subset=['Diff S1']),
-                column_order=["Ticker", "Qty", "Avg Cost", "Current Price", "% P/L", "Value USD", "Total Gain USD", "Upside", "Diff S1", "Buy Lv.1", "Sell Lv.1"],
-                column_config={
-                    "Current Price": "Price", "% P/L": "% Total", "Value USD": "Value ($)", "Total Gain USD": "Total Gain ($)",
-                    "Buy Lv.1": "Buy Lv.1", "Sell Lv.1": "Sell Lv.1", "Upside": st.column_config.Column("Upside", help="Gap to Sell Lv.1")
-                },
-                hide_index=True, use_container_width=True
-            )
-        else:
-            st.info("No Defensive stocks.")
+        holdings_table("Defensive", "No Defensive stocks.")
 
     # --- RIGHT SIDE: Watchlist ---
     with col_bot_right:
         st.subheader("🎯 Sniper Watchlist (Fractional Unlocked)")
-        
-        watchlist_data = []
-        for t in sorted(list(set(st.session_state.watchlist))): 
-            data = market_data.get(t, {})
-            price = data.get('Price', 0)
-            prev = data.get('PrevClose', 0)
-            pct_change = (price - prev) / prev if prev > 0 else 0
-            
-            buy1 = data.get('EMA50', 0)
-            sell1 = data.get('Sell1', 0)
-            rsi = data.get('RSI', 50)
-            
-            diff_s1 = (price - buy1)/buy1 if buy1 > 0 else 9.99
-            upside = (sell1 - price)/price if price > 0 else 0
-            
-            signal = "4. Wait" 
-            if diff_s1 < 0 and price > 0: signal = "1. ✅ IN ZONE"
-            elif 0 <= diff_s1 <= 0.02 and price > 0: signal = "2. 🟢 ALERT"
-            elif price >= sell1: signal = "5. 🔴 PROFIT"
-            else: signal = "3. ➖ Wait"
-            
-            watchlist_data.append({
-                "Tier": prb_tiers.get(t, "-"), "Ticker": t, "Price": price, "% Day": pct_change, "Signal": signal, 
-                "Diff S1": diff_s1, "RSI": rsi, "Upside": upside,
-                "Buy Lv.1": data.get('EMA50', 0), "Buy Lv.2": data.get('EMA200', 0), 
-                "Sell Lv.1": data.get('Sell1', 0), "Sell Lv.2": data.get('Sell2', 0),
-                "Display Signal": signal.split(". ")[1] 
-            })
-        
-        df_watch = pd.DataFrame(watchlist_data)
-        if not df_watch.empty:
-            df_watch = df_watch.sort_values(by=["Signal", "Diff S1"], ascending=[True, True])
-
-            st.dataframe(
-                df_watch.style.format({
-                    "Price": "${:.2f}", "% Day": format_arrow, "Diff S1": "{:+.1%}", "RSI": "{:.0f}", "Upside": "{:+.1%}",
-                    "Buy Lv.1": "${:.0f}", "Buy Lv.2": "${:.0f}", "Sell Lv.1": "${:.0f}", "Sell Lv.2": "${:.0f}"
-                })
-                .apply(highlight_row, axis=1)
-                .map(color_diff_s1_logic, subset=['Diff S1'])
-                .map(color_tier, subset=['Tier'])
-                .map(color_rsi, subset=['RSI'])
-                .map(color_text, subset=['Upside']), 
-                column_config={
-                    "Display Signal": st.column_config.Column("Status", width="medium"),
-                    "Tier": st.column_config.Column("Tier", width="small"),
-                    "Ticker": st.column_config.Column("Symbol", width="small"),
-                    "Price": st.column_config.Column("Price", width="small"),
-                    "% Day": st.column_config.Column("% Day", width="small"),
-                    "Diff S1": st.column_config.Column("Diff S1", help="Distance to EMA 50"),
-                    "Upside": st.column_config.Column("Upside", help="Gap to Sell Lv.1"),
-                    "RSI": st.column_config.Column("RSI", help="RSI (14)"),
-                    "Buy Lv.1": st.column_config.Column("Buy (EMA50)"),
-                    "Buy Lv.2": st.column_config.Column("Buy (EMA200)"),
-                    "Sell Lv.1": st.column_config.Column("Sell (R1)"),
-                    "Sell Lv.2": st.column_config.Column("Sell (R2)"),
-                },
-                column_order=["Display Signal", "Tier", "Ticker", "Price", "% Day", "Upside", "Diff S1", "RSI", "Buy Lv.1", "Buy Lv.2", "Sell Lv.1", "Sell Lv.2"],
-                hide_index=True, use_container_width=True
-            )
-        else:
-            st.info("Watchlist is empty.")
+        alert_feed()
+        watchlist_table()
 
 except Exception as e:
     st.error(f"System Error: {e}")
+
+log_run(timer)
+st.session_state._app_run = False
+
+# --- 9. Diagnostics Panel ---
+if st.session_state.get('show_diagnostics'):
+    run_log = st.session_state.perf_log
+    with st.sidebar:
+        st.subheader("🩺 Diagnostics")
+        last_run = run_log[-1]
+        st.caption(f"Last rerun: {last_run['total_seconds'] * 1000:,.0f} ms | Peak RSS: {last_run['max_rss_mb'] or 0:,.0f} MB"
+                   f" | Snapshot v{last_run.get('snapshot_version', 0)}: {last_run.get('snapshot_tickers', 0):,} tickers,"
+                   f" {last_run.get('snapshot_kb', 0):,.0f} KB")
+        df_stages = pd.DataFrame(last_run['stages'])
+        df_stages['ms'] = df_stages['seconds'] * 1000
+        st.dataframe(df_stages, hide_index=True, use_container_width=True,
+                     column_order=[c for c in ["stage", "ms", "rows", "tickers", "hits", "misses", "parent"] if c in df_stages],
+                     column_config={"ms": st.column_config.NumberColumn("ms", format="%.1f")})
+        counters = {k: v for k, v in last_run.items() if k.endswith(("_hits", "_misses", "_evictions", "_advanced", "_seeded"))}
+        st.caption(" | ".join(f"{k}: {v}" for k, v in counters.items()))
+
+        df_history = pd.DataFrame({
+            "rerun": range(len(run_log)), "total ms": [r['total_seconds'] * 1000 for r in run_log]
+        })
+        st.line_chart(df_history, x="rerun", y="total ms", height=150)
+
+        d1, d2 = st.columns(2)
+        d1.download_button("⬇️ JSON", json.dumps(run_log, default=str), file_name="sniper_perf.json", mime="application/json")
+        d2.download_button("⬇️ CSV", pd.DataFrame(flatten(run_log)).to_csv(index=False), file_name="sniper_perf.csv", mime="text/csv")
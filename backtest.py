@@ -0,0 +1,205 @@
+"""Vectorized backtest of the Sniper entry/exit rules over stored daily bars.
+
+Replays the dashboard rules on every ticker of a universe at once:
+
+    entry  close <= buy EMA * (1 + ALERT band)    (watchlist IN ZONE / ALERT)
+    exit   close >= Sell Lv.1 (upper Bollinger)   (PROFIT), or Sell Lv.2 (52-week high) with --exit sell2
+
+Signals are evaluated on each close and filled at that close; a bar with both
+an entry and an exit signal keeps the current position. No signal is taken
+before a ticker has MIN_BARS of history, as in the dashboard.
+
+    python backtest.py sp500.txt --period 10y
+    python backtest.py sp500.txt --buy-span 50 200 --band-k 1.5 2 2.5 --alert 0 0.02 0.05 --out sweep.csv
+
+With a single parameter set it prints per-tier results and writes per-ticker
+results to --out; with several values for any parameter it runs the whole grid
+and writes one summary row per combination. Bars come from the local bar store
+(SNIPER_DATA_DIR), synced and back-filled to --period unless --no-sync.
+"""
+import argparse
+import itertools
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from indicators import BAND_WINDOW, HIGH_WINDOW, MIN_BARS, close_matrix
+from market_store import BarStore
+from providers import provider_from_env
+from screener import load_universe
+from signals import ALERT_BAND, PRB_TIERS
+
+BACKTEST_PERIOD = "10y"
+EXIT_LEVELS = ("sell1", "sell2")
+
+
+def load_close(tickers, period=BACKTEST_PERIOD, sync=True, data_dir=None):
+    """Close matrix over `period`; internal gaps (e.g. exchange holidays) are carried forward."""
+    store = BarStore(root=data_dir, provider=provider_from_env())
+    if sync:
+        store.sync(tickers)
+        store.backfill(tickers, period)
+    return close_matrix(store.history(tickers, period), tickers).ffill()
+
+
+class Levels:
+    """Indicator series for the whole matrix, shared across a parameter sweep."""
+
+    def __init__(self, close):
+        self.close = close
+        self.ready = close.notna().cumsum().to_numpy() >= MIN_BARS
+        rolling = close.rolling(BAND_WINDOW)
+        self.sma, self.std = rolling.mean().to_numpy(), rolling.std().to_numpy()
+        self.high = close.rolling(HIGH_WINDOW, min_periods=1).max().to_numpy()
+        self._ema = {}
+
+    def ema(self, span):
+        if span not in self._ema:
+            self._ema[span] = self.close.ewm(span=span, adjust=False).mean().to_numpy()
+        return self._ema[span]
+
+    def sell(self, exit_level, band_k):
+        return self.sma + self.std * band_k if exit_level == "sell1" else self.high
+
+
+def positions(entry, exit_):
+    """1 while holding: entries open, exits close, conflicting or empty bars keep the last state."""
+    event = np.where(entry & ~exit_, 1.0, np.where(exit_ & ~entry, 0.0, np.nan))
+    return pd.DataFrame(event).ffill().fillna(0.0).to_numpy()
+
+
+def trade_table(close, pos, tickers, dates):
+    """One row per round trip; a position still open at the end is marked at the last close."""
+    held = np.vstack([np.zeros((1, pos.shape[1])), pos])
+    step = np.diff(held, axis=0)
+    entry_col, entry_row = np.nonzero(step.T > 0)
+    exit_col, exit_row = np.nonzero(step.T < 0)
+    open_cols = np.flatnonzero(pos[-1] > 0)
+    exit_col = np.concatenate([exit_col, open_cols])
+    exit_row = np.concatenate([exit_row, np.full(len(open_cols), len(pos) - 1)])
+    order = np.lexsort((exit_row, exit_col))
+    exit_col, exit_row = exit_col[order], exit_row[order]
+
+    return pd.DataFrame({
+        "Ticker": np.asarray(tickers, dtype=object)[entry_col],
+        "Entry Date": dates[entry_row], "Exit Date": dates[exit_row],
+        "Entry": close[entry_row, entry_col], "Exit": close[exit_row, exit_col],
+        "Return": close[exit_row, exit_col] / close[entry_row, entry_col] - 1,
+        "Bars": exit_row - entry_row, "Open": np.isin(exit_col, open_cols) & (exit_row == len(pos) - 1),
+    })
+
+
+def run(levels, buy_span=50, band_k=2.0, alert=ALERT_BAND, exit_level="sell1"):
+    """Simulate one parameter set; returns (per-ticker results, trades)."""
+    close = levels.close.to_numpy()
+    buy = levels.ema(buy_span)
+    with np.errstate(invalid="ignore"):
+        entry = levels.ready & (close <= buy * (1 + alert))
+        exit_ = levels.ready & (close >= levels.sell(exit_level, band_k))
+    pos = positions(entry, exit_)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        daily = np.nan_to_num(close[1:] / close[:-1] - 1)
+    equity = np.vstack([np.ones((1, close.shape[1])), np.cumprod(1 + pos[:-1] * daily, axis=0)])
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1
+
+    tickers, dates = list(levels.close.columns), levels.close.index
+    trades = trade_table(close, pos, tickers, dates)
+    closed = trades[~trades['Open']]
+    per_trade = closed.assign(Win=closed['Return'] > 0).groupby("Ticker")
+
+    # Buy & hold from the first bar a signal could be taken
+    first = levels.ready.argmax(axis=0)
+    has_signal = levels.ready.any(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hold = np.where(has_signal, close[-1] / close[first, np.arange(close.shape[1])] - 1, np.nan)
+        exposure = pos.sum(axis=0) / np.maximum(levels.ready.sum(axis=0), 1)
+
+    result = pd.DataFrame({
+        "Ticker": tickers, "Tier": pd.Series(tickers).map(PRB_TIERS).fillna("-").to_numpy(),
+        "Trades": trades.groupby("Ticker").size().reindex(tickers, fill_value=0).to_numpy(),
+        "Hit Rate": per_trade['Win'].mean().reindex(tickers).to_numpy(),
+        "Avg Trade": per_trade['Return'].mean().reindex(tickers).to_numpy(),
+        "Return": equity[-1] - 1, "Max Drawdown": drawdown.min(axis=0),
+        "Exposure": exposure, "Buy & Hold": hold,
+    })
+    return result[has_signal].reset_index(drop=True), trades
+
+
+def tier_report(result, trades):
+    """Per PRB tier: ticker count, pooled hit rate over closed trades, return and drawdown."""
+    closed = trades[~trades['Open']].assign(Tier=lambda t: t['Ticker'].map(PRB_TIERS).fillna("-"))
+    pooled = closed.groupby("Tier")['Return'].agg(Closed="size", Hits=lambda r: (r > 0).sum())
+    report = result.groupby("Tier").agg(
+        Tickers=("Ticker", "size"), Trades=("Trades", "sum"), Median_Return=("Return", "median"),
+        Mean_Return=("Return", "mean"), Mean_Drawdown=("Max Drawdown", "mean"), Worst_Drawdown=("Max Drawdown", "min"),
+    ).join(pooled)
+    report.insert(2, "Hit Rate", report['Hits'] / report['Closed'])
+    return report.drop(columns=["Closed", "Hits"]).rename(columns=lambda c: c.replace("_", " "))
+
+
+def sweep(levels, buy_spans, band_ks, alerts, exit_level="sell1"):
+    """One summary row per parameter combination."""
+    rows = []
+    for buy_span, band_k, alert in itertools.product(buy_spans, band_ks, alerts):
+        result, trades = run(levels, buy_span, band_k, alert, exit_level)
+        closed = trades.loc[~trades['Open'], 'Return']
+        rows.append({
+            "Buy Span": buy_span, "Band K": band_k, "Alert": alert, "Tickers": len(result),
+            "Trades": int(result['Trades'].sum()), "Hit Rate": (closed > 0).mean() if len(closed) else np.nan,
+            "Avg Trade": closed.mean(), "Median Return": result['Return'].median(),
+            "Mean Drawdown": result['Max Drawdown'].mean(), "Exposure": result['Exposure'].mean(),
+        })
+    return pd.DataFrame(rows).sort_values("Median Return", ascending=False, ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("universe", help="ticker list (.txt, one per line) or CSV with a Ticker/Symbol column")
+    parser.add_argument("--period", default=BACKTEST_PERIOD)
+    parser.add_argument("--buy-span", type=int, nargs="+", default=[50], help="EMA span of the buy level")
+    parser.add_argument("--band-k", type=float, nargs="+", default=[2.0], help="Bollinger width for Sell Lv.1")
+    parser.add_argument("--alert", type=float, nargs="+", default=[ALERT_BAND], help="ALERT band above the buy EMA")
+    parser.add_argument("--exit", dest="exit_level", choices=EXIT_LEVELS, default="sell1")
+    parser.add_argument("--out", default=None, help="per-ticker (or sweep) results as .parquet or .csv")
+    parser.add_argument("--trades", default=None, help="single run: write every trade to this .parquet or .csv")
+    parser.add_argument("--no-sync", action="store_true", help="use the local bar store only, no downloads")
+    parser.add_argument("--data-dir", default=None, help="bar store root (default SNIPER_DATA_DIR)")
+    args = parser.parse_args(argv)
+
+    tickers = load_universe(args.universe)
+    t0 = time.perf_counter()
+    close = load_close(tickers, args.period, not args.no_sync, args.data_dir)
+    t_load = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    levels = Levels(close)
+    grid = [args.buy_span, args.band_k, args.alert]
+    if all(len(values) == 1 for values in grid):
+        result, trades = run(levels, *(values[0] for values in grid), args.exit_level)
+        print(tier_report(result, trades).to_string(float_format=lambda v: f"{v:.3f}"))
+        frames = [(args.out, result), (args.trades, trades)]
+        n_runs = 1
+    else:
+        result = sweep(levels, *grid, args.exit_level)
+        print(result.head(20).to_string(float_format=lambda v: f"{v:.3f}"))
+        frames = [(args.out, result)]
+        n_runs = len(list(itertools.product(*grid)))
+    elapsed = time.perf_counter() - t0
+
+    for path, frame in frames:
+        if not path:
+            continue
+        if path.lower().endswith(".csv"):
+            frame.to_csv(path, index=False)
+        else:
+            frame.to_parquet(path, index=False)
+
+    print(f"Backtested {close.shape[1]} tickers x {close.shape[0]} bars, {n_runs} run(s) in {elapsed:.2f}s "
+          f"(load {t_load:.1f}s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
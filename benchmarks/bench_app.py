@@ -0,0 +1,111 @@
+"""End-to-end benchmark of one dashboard rerun on synthetic market data.
+
+Drives app.py headlessly with Streamlit's AppTest and the offline replay
+provider, then writes per-stage wall time and peak memory as JSON:
+
+    python benchmarks/bench_app.py --sizes 10 100 1000 5000 --out bench_app.json
+
+For each size the portfolio holds --portfolio-share of the tickers and the
+watchlist the rest. Three runs are recorded per size:
+  cold   - empty bar store and caches (includes provider "download")
+  warm   - caches warm, i.e. a normal rerun
+  memory - a warm rerun under tracemalloc, for peak memory only
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def synthetic_universe(n, portfolio_share):
+    tickers = [f"S{i:05d}" for i in range(n)]
+    n_port = max(1, int(n * portfolio_share))
+    portfolio = [
+        {"Ticker": t, "Category": "Growth" if i % 3 else "Defensive", "Avg Cost": 100.0, "Qty": 1.0}
+        for i, t in enumerate(tickers[:n_port])
+    ]
+    return portfolio, tickers[n_port:]
+
+
+def run_once(app, portfolio, watchlist, measure_memory=False):
+    import perf
+
+    app.session_state["portfolio"] = portfolio
+    app.session_state["watchlist"] = watchlist
+    if measure_memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    app.run()
+    wall = time.perf_counter() - t0
+    peak = None
+    if measure_memory:
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    errors = [e.value for e in app.error] + [str(e.value) for e in app.exception]
+    return {"wall_seconds": wall, "peak_mb": peak, "errors": errors, "script": perf.LAST_RUN}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--portfolio-share", type=float, default=0.2)
+    parser.add_argument("--timeout", type=float, default=900)
+    parser.add_argument("--out", default="bench_app.json")
+    args = parser.parse_args()
+
+    os.environ["SNIPER_PROVIDER"] = "replay"
+    os.environ.setdefault("SNIPER_REPLAY_END", "2025-01-10")
+
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    results = []
+    for n in args.sizes:
+        # A fresh bar store and portfolio store per size; the app's BarStore picks
+        # up DATA_DIR when it is built. The synthetic book is stored as the default
+        # book, which a new session opens.
+        with tempfile.TemporaryDirectory() as data_dir:
+            import market_store
+            from portfolio_store import DEFAULT_PORTFOLIO, PortfolioStore
+            market_store.DATA_DIR = data_dir
+            os.environ["SNIPER_DB"] = os.path.join(data_dir, "sniper.db")
+            st.cache_resource.clear()
+
+            portfolio, watchlist = synthetic_universe(n, args.portfolio_share)
+            PortfolioStore().create(DEFAULT_PORTFOLIO, {"portfolio": portfolio, "watchlist": watchlist,
+                                                        "note": "", "cash": 0.0})
+            app = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=args.timeout)
+            for run, memory in (("cold", False), ("warm", False), ("memory", True)):
+                record = run_once(app, portfolio, watchlist, measure_memory=memory)
+                record.update({"tickers": n, "portfolio": len(portfolio), "watchlist": len(watchlist), "run": run})
+                results.append(record)
+                stages = {s["stage"]: round(s["seconds"], 3) for s in (record["script"] or {}).get("stages", [])}
+                print(f"{n:>6} {run:<6} wall={record['wall_seconds']:.3f}s "
+                      f"peak={record['peak_mb'] or 0:.1f}MB {stages}", file=sys.stderr)
+
+    report = {
+        "commit": git_commit(), "timestamp": time.time(), "python": platform.python_version(),
+        "platform": platform.platform(), "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"wrote {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
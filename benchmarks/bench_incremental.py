@@ -0,0 +1,98 @@
+"""Check and time incremental indicator updates against a full recompute.
+
+Seeds IndicatorState from the first --bars rows, then feeds the remaining
+--days rows one bar at a time and compares values(), provisional() and a
+JSON round trip with compute_indicators over the whole history. Exits
+non-zero if any field differs by more than --tol (relative).
+
+    python benchmarks/bench_incremental.py --sizes 16 500 5000 --days 60
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from incremental import IndicatorState, states_from_close  # noqa: E402
+from indicators import INDICATOR_FIELDS, compute_indicators  # noqa: E402
+
+
+def synthetic_close(n_tickers, n_bars, seed=0):
+    """Random-walk closes with ragged starts (some tickers short of MIN_BARS) and flat stretches."""
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(end="2025-01-10", periods=n_bars, name="Date")
+    steps = rng.normal(0.0005, 0.02, size=(n_bars, n_tickers))
+    steps[rng.random(steps.shape) < 0.05] = 0.0
+    close = 100 * np.exp(np.cumsum(steps, axis=0))
+    starts = rng.integers(0, n_bars - 150, size=n_tickers)
+    close[np.arange(n_bars)[:, None] < starts[None, :]] = np.nan
+    return pd.DataFrame(close, index=idx, columns=[f"T{i:05d}" for i in range(n_tickers)])
+
+
+def frame(states, tickers, fn):
+    return pd.DataFrame.from_dict({t: fn(states.get(t, IndicatorState())) for t in tickers}, orient="index")
+
+
+def max_rel_err(result, expected):
+    result, expected = result[INDICATOR_FIELDS], expected.loc[result.index, INDICATOR_FIELDS]
+    both_nan = result.isna() & expected.isna()
+    err = (result - expected).abs() / expected.abs().clip(lower=1e-12)
+    return float(err.where(~both_nan, 0.0).fillna(np.inf).max().max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 500, 5000])
+    parser.add_argument("--bars", type=int, default=504)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--tol", type=float, default=1e-9)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'tickers':>8} {'seed (s)':>9} {'update (us)':>12} {'tick (us)':>10} {'recompute (s)':>14} "
+          f"{'err bar':>9} {'err tick':>9} {'err json':>9}")
+    for n in args.sizes:
+        close = synthetic_close(n, args.bars + args.days + 1)
+        tickers = list(close.columns)
+        history, live = close.iloc[:-1], close.iloc[-1]
+
+        t0 = time.perf_counter()
+        states = states_from_close(history.iloc[:args.bars])
+        t_seed = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        updates = 0
+        for date, row in history.iloc[args.bars:].iterrows():
+            for ticker, value in row.dropna().items():
+                states.setdefault(ticker, IndicatorState()).update(date, value)
+                updates += 1
+        t_update = (time.perf_counter() - t0) / max(updates, 1)
+
+        t0 = time.perf_counter()
+        ticks = {t: s.provisional(live[t]) for t, s in states.items() if not np.isnan(live[t])}
+        t_tick = (time.perf_counter() - t0) / max(len(ticks), 1)
+
+        t0 = time.perf_counter()
+        expected_bar = compute_indicators(history)
+        t_full = time.perf_counter() - t0
+        expected_tick = compute_indicators(close)
+
+        err_bar = max_rel_err(frame(states, tickers, IndicatorState.values), expected_bar)
+        err_tick = max_rel_err(pd.DataFrame.from_dict(ticks, orient="index"), expected_tick)
+        restored = {t: IndicatorState.from_dict(s.to_dict()) for t, s in states.items()}
+        err_json = max_rel_err(frame(restored, tickers, IndicatorState.values), expected_bar)
+
+        print(f"{n:>8} {t_seed:>9.4f} {t_update * 1e6:>12.2f} {t_tick * 1e6:>10.2f} {t_full:>14.4f} "
+              f"{err_bar:>9.1e} {err_tick:>9.1e} {err_json:>9.1e}")
+        failed |= max(err_bar, err_tick, err_json) > args.tol
+
+    if failed:
+        print(f"FAILED: incremental state differs from full recompute by more than {args.tol:g}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark the vectorized indicator engine against the original per-ticker loop.
+
+    python benchmarks/bench_indicators.py --sizes 16 500 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indicators import DEFAULT_ROW, INDICATOR_FIELDS, close_matrix, compute_indicators  # noqa: E402
+
+
+def synthetic_bars(n_tickers, n_bars=504, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(end="2025-01-10", periods=n_bars, name="Date")
+    steps = rng.normal(0.0005, 0.02, size=(n_bars, n_tickers))
+    close = 100 * np.exp(np.cumsum(steps, axis=0))
+    bars = {}
+    for i in range(n_tickers):
+        c = close[:, i]
+        bars[f"T{i:05d}"] = pd.DataFrame(
+            {"Open": c, "High": c * 1.01, "Low": c * 0.99, "Close": c, "Volume": 1e6}, index=idx
+        )
+    return bars
+
+
+def loop_indicators(bars, tickers_list):
+    """The per-ticker loop formerly inlined in get_realtime_data."""
+    data_dict = {}
+    for ticker in tickers_list:
+        try:
+            df_t = bars[ticker].copy()
+            df_t = df_t.dropna()
+            if df_t.empty or len(df_t) < 200:
+                data_dict[ticker] = dict(DEFAULT_ROW)
+                continue
+
+            current_price = df_t['Close'].iloc[-1]
+            prev_close = df_t['Close'].iloc[-2]
+
+            df_t['EMA50'] = df_t['Close'].ewm(span=50, adjust=False).mean()
+            df_t['EMA200'] = df_t['Close'].ewm(span=200, adjust=False).mean()
+
+            delta = df_t['Close'].diff()
+            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+            rs = gain / loss
+            df_t['RSI'] = 100 - (100 / (1 + rs))
+
+            df_t['SMA20'] = df_t['Close'].rolling(window=20).mean()
+            df_t['STD20'] = df_t['Close'].rolling(window=20).std()
+            sell_r1 = (df_t['SMA20'] + (df_t['STD20'] * 2)).iloc[-1]
+            sell_r2 = df_t['Close'].iloc[-252:].max()
+
+            data_dict[ticker] = {
+                "Price": current_price, "PrevClose": prev_close,
+                "EMA50": df_t['EMA50'].iloc[-1], "EMA200": df_t['EMA200'].iloc[-1],
+                "RSI": df_t['RSI'].iloc[-1], "Sell1": sell_r1, "Sell2": sell_r2
+            }
+        except Exception:
+            data_dict[ticker] = dict(DEFAULT_ROW)
+    return data_dict
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 500, 5000])
+    parser.add_argument("--bars", type=int, default=504)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'tickers':>8} {'loop (s)':>10} {'matrix (s)':>11} {'engine (s)':>11} {'speedup':>8} {'max rel err':>12}")
+    for n in args.sizes:
+        bars = synthetic_bars(n, args.bars)
+        tickers = list(bars)
+        t_loop, expected = best_of(lambda: loop_indicators(bars, tickers), args.repeat)
+        t_matrix, close = best_of(lambda: close_matrix(bars, tickers), args.repeat)
+        t_vec, result = best_of(lambda: compute_indicators(close), args.repeat)
+
+        expected = pd.DataFrame.from_dict(expected, orient="index")[INDICATOR_FIELDS]
+        err = ((result[INDICATOR_FIELDS] - expected).abs() / expected.abs().clip(lower=1e-12)).max().max()
+        speedup = t_loop / (t_matrix + t_vec)
+        print(f"{n:>8} {t_loop:>10.4f} {t_matrix:>11.4f} {t_vec:>11.4f} {speedup:>7.1f}x {err:>12.2e}")
+
+
+if __name__ == "__main__":
+    main()
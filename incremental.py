@@ -0,0 +1,248 @@
+import json
+import math
+import os
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from indicators import BAND_WINDOW, DEFAULT_ROW, HIGH_WINDOW, MIN_BARS, RSI_WINDOW, pack_right
+
+# --- Incremental Indicator State ---
+# Per-ticker carried state for the Sniper levels, so a new daily bar (update)
+# or a live intraday price (provisional) costs O(1) instead of a recompute over
+# the full history:
+#   EMA50 / EMA200      - last EMA values (recursive filter, adjust=False)
+#   RSI(14)             - last 14 gains/losses with running sums
+#   Sell1 (BB upper)    - last 20 closes with running sum and sum of squares
+#   Sell2 (52w high)    - monotonic deque of (bar number, close) over 252 bars
+# Running sums are re-added from their windows every RESYNC_EVERY bars to keep
+# floating-point drift bounded.
+
+EMA50_ALPHA = 2 / (50 + 1)
+EMA200_ALPHA = 2 / (200 + 1)
+RESYNC_EVERY = 1000
+
+
+def _rsi(gain_sum, loss_sum):
+    if loss_sum == 0:
+        return math.nan if gain_sum == 0 else 100.0
+    return 100 - (100 / (1 + gain_sum / loss_sum))
+
+
+def _upper_band(total, total_sq, n):
+    if n < BAND_WINDOW:
+        return math.nan
+    mean = total / n
+    var = max(total_sq - total * mean, 0.0) / (n - 1)
+    return mean + math.sqrt(var) * 2
+
+
+class IndicatorState:
+    def __init__(self):
+        self.date = None
+        self.count = 0
+        self.close = math.nan
+        self.prev_close = math.nan
+        self.ema50 = math.nan
+        self.ema200 = math.nan
+        self.gains, self.losses = deque(), deque()
+        self.gain_sum = self.loss_sum = 0.0
+        self.band = deque()
+        self.band_sum = self.band_sumsq = 0.0
+        self.highs = deque()
+        self._since_resync = 0
+
+    # --- advancing ---
+    def update(self, date, close):
+        """Append one completed bar."""
+        close = float(close)
+        if self.count == 0:
+            self.ema50 = self.ema200 = close
+        else:
+            self.ema50 += EMA50_ALPHA * (close - self.ema50)
+            self.ema200 += EMA200_ALPHA * (close - self.ema200)
+            delta = close - self.close
+            self.gains.append(max(delta, 0.0))
+            self.losses.append(max(-delta, 0.0))
+            self.gain_sum += self.gains[-1]
+            self.loss_sum += self.losses[-1]
+            if len(self.gains) > RSI_WINDOW:
+                self.gain_sum -= self.gains.popleft()
+                self.loss_sum -= self.losses.popleft()
+
+        self.band.append(close)
+        self.band_sum += close
+        self.band_sumsq += close * close
+        if len(self.band) > BAND_WINDOW:
+            old = self.band.popleft()
+            self.band_sum -= old
+            self.band_sumsq -= old * old
+
+        while self.highs and self.highs[-1][1] <= close:
+            self.highs.pop()
+        self.highs.append((self.count, close))
+        if self.highs[0][0] <= self.count - HIGH_WINDOW:
+            self.highs.popleft()
+
+        self.prev_close, self.close = self.close, close
+        self.date = pd.Timestamp(date)
+        self.count += 1
+        self._since_resync += 1
+        if self._since_resync >= RESYNC_EVERY:
+            self._resync()
+
+    def _resync(self):
+        self.gain_sum, self.loss_sum = math.fsum(self.gains), math.fsum(self.losses)
+        self.band_sum = math.fsum(self.band)
+        self.band_sumsq = math.fsum(x * x for x in self.band)
+        self._since_resync = 0
+
+    def can_advance(self, closes):
+        """True if `closes` (Date-indexed) continues this state without re-adjusted history."""
+        if self.date is None or closes.empty or self.date not in closes.index:
+            return False
+        stored = closes.loc[self.date]
+        return abs(stored - self.close) <= 1e-9 * max(abs(self.close), 1.0)
+
+    def advance(self, closes):
+        """Apply every bar of `closes` after the state's date; returns the number applied."""
+        new = closes[closes.index > self.date]
+        for date, close in new.items():
+            self.update(date, close)
+        return len(new)
+
+    # --- reading ---
+    def values(self):
+        if self.count < MIN_BARS:
+            return dict(DEFAULT_ROW)
+        return {
+            "Price": self.close, "PrevClose": self.prev_close, "EMA50": self.ema50, "EMA200": self.ema200,
+            "RSI": _rsi(self.gain_sum, self.loss_sum),
+            "Sell1": _upper_band(self.band_sum, self.band_sumsq, len(self.band)),
+            "Sell2": self.highs[0][1] if self.highs else math.nan,
+        }
+
+    def provisional(self, price):
+        """Levels as if `price` closed the next bar, without changing the state."""
+        if self.count + 1 < MIN_BARS:
+            return dict(DEFAULT_ROW)
+        price = float(price)
+        delta = price - self.close
+        full_rsi = len(self.gains) == RSI_WINDOW
+        gain_sum = self.gain_sum + max(delta, 0.0) - (self.gains[0] if full_rsi else 0.0)
+        loss_sum = self.loss_sum + max(-delta, 0.0) - (self.losses[0] if full_rsi else 0.0)
+
+        full_band = len(self.band) == BAND_WINDOW
+        old = self.band[0] if full_band else 0.0
+        band_sum = self.band_sum + price - old
+        band_sumsq = self.band_sumsq + price * price - old * old
+
+        highs = self.highs
+        expiring = highs and highs[0][0] <= self.count - HIGH_WINDOW
+        window_high = (highs[1][1] if len(highs) > 1 else -math.inf) if expiring else highs[0][1]
+        return {
+            "Price": price, "PrevClose": self.close,
+            "EMA50": self.ema50 + EMA50_ALPHA * (price - self.ema50),
+            "EMA200": self.ema200 + EMA200_ALPHA * (price - self.ema200),
+            "RSI": _rsi(gain_sum, loss_sum),
+            "Sell1": _upper_band(band_sum, band_sumsq, len(self.band) + (0 if full_band else 1)),
+            "Sell2": max(window_high, price),
+        }
+
+    # --- persistence ---
+    def to_dict(self):
+        return {
+            "date": self.date.isoformat() if self.date is not None else None, "count": self.count,
+            "close": self.close, "prev_close": self.prev_close, "ema50": self.ema50, "ema200": self.ema200,
+            "gains": list(self.gains), "losses": list(self.losses),
+            "band": list(self.band), "highs": [list(h) for h in self.highs],
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        state = cls()
+        state.date = pd.Timestamp(d["date"]) if d["date"] else None
+        state.count = d["count"]
+        state.close, state.prev_close = d["close"], d["prev_close"]
+        state.ema50, state.ema200 = d["ema50"], d["ema200"]
+        state.gains, state.losses = deque(d["gains"]), deque(d["losses"])
+        state.band = deque(d["band"])
+        state.highs = deque(tuple(h) for h in d["highs"])
+        state._resync()
+        return state
+
+
+def states_from_close(close):
+    """Seed an IndicatorState per column of a Close matrix in one vectorized pass."""
+    packed, counts = pack_right(close.to_numpy(dtype="float64"))
+    if len(packed) == 0:
+        return {}
+    ema50 = pd.DataFrame(packed).ewm(span=50, adjust=False).mean().to_numpy()[-1]
+    ema200 = pd.DataFrame(packed).ewm(span=200, adjust=False).mean().to_numpy()[-1]
+    valid = ~np.isnan(close.to_numpy(dtype="float64"))
+    last_pos = len(close) - 1 - valid[::-1].argmax(axis=0)
+
+    states = {}
+    for j, ticker in enumerate(close.columns):
+        n = int(counts[j])
+        if n == 0:
+            continue
+        col = packed[-n:, j]
+        state = IndicatorState()
+        state.count = n
+        state.date = close.index[last_pos[j]]
+        state.close = float(col[-1])
+        state.prev_close = float(col[-2]) if n > 1 else math.nan
+        state.ema50, state.ema200 = float(ema50[j]), float(ema200[j])
+
+        deltas = np.diff(col[-(RSI_WINDOW + 1):])
+        state.gains = deque(np.maximum(deltas, 0.0).tolist())
+        state.losses = deque(np.maximum(-deltas, 0.0).tolist())
+        state.band = deque(col[-BAND_WINDOW:].tolist())
+
+        window = col[-HIGH_WINDOW:]
+        later_max = np.append(np.maximum.accumulate(window[::-1])[::-1][1:], -np.inf)
+        keep = np.flatnonzero(window > later_max)
+        state.highs = deque(zip((keep + n - len(window)).tolist(), window[keep].tolist()))
+        state._resync()
+        states[ticker] = state
+    return states
+
+
+class StateStore:
+    """One JSON file per ticker's IndicatorState, so a save only rewrites the tickers that changed."""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, ticker):
+        return os.path.join(self.root, ticker.replace(os.sep, "_") + ".json")
+
+    def load(self):
+        states = {}
+        for name in os.listdir(self.root):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.root, name)) as f:
+                    d = json.load(f)
+                states[d["ticker"]] = IndicatorState.from_dict(d)
+            except (OSError, ValueError, KeyError):
+                continue
+        return states
+
+    def save(self, changed):
+        """Write {ticker: state dict (IndicatorState.to_dict())}; None removes the ticker's file."""
+        for ticker, d in changed.items():
+            path = self._path(ticker)
+            if d is None:
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(dict(d, ticker=ticker), f)
+            os.replace(tmp, path)
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+# --- Vectorized Indicator Engine ---
+# Computes the Sniper levels for every ticker at once from a wide Close matrix
+# (dates x tickers) instead of looping over per-ticker frames.
+
+INDICATOR_FIELDS = ["Price", "PrevClose", "EMA50", "EMA200", "RSI", "Sell1", "Sell2"]
+DEFAULT_ROW = {"Price": 0, "PrevClose": 0, "EMA50": 0, "EMA200": 0, "RSI": 50, "Sell1": 0, "Sell2": 0}
+MIN_BARS = 200
+RSI_WINDOW = 14
+BAND_WINDOW = 20
+HIGH_WINDOW = 252
+
+
+def close_matrix(bars, tickers):
+    """Build the Close matrix from {ticker: OHLCV frame}; missing bars stay NaN."""
+    cols = {t: bars[t]['Close'] for t in tickers if t in bars}
+    close = pd.concat(cols, axis=1) if cols else pd.DataFrame(index=pd.DatetimeIndex([], name="Date"))
+    return close.reindex(columns=list(tickers)).astype("float64")
+
+
+def pack_right(values):
+    """Move NaNs to the top of each column, keeping valid values in order at the bottom.
+
+    After packing, the last rows of every column are its latest valid bars, which
+    is what a per-ticker dropna() would give.
+    """
+    valid = ~np.isnan(values)
+    order = np.argsort(valid, axis=0, kind="stable")
+    return np.take_along_axis(values, order, axis=0), valid.sum(axis=0)
+
+
+def compute_indicators(close):
+    """Return a ticker-indexed frame with INDICATOR_FIELDS for every column of `close`."""
+    tickers = list(close.columns)
+    if close.empty:
+        return pd.DataFrame([DEFAULT_ROW] * len(tickers), index=pd.Index(tickers, name="Ticker"))
+
+    packed, counts = pack_right(close.to_numpy(dtype="float64"))
+    packed_df = pd.DataFrame(packed)
+
+    ema50 = packed_df.ewm(span=50, adjust=False).mean().to_numpy()[-1]
+    ema200 = packed_df.ewm(span=200, adjust=False).mean().to_numpy()[-1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta = np.diff(packed[-(RSI_WINDOW + 1):], axis=0)
+        gain = np.where(delta > 0, delta, 0).mean(axis=0)
+        loss = np.where(delta < 0, -delta, 0).mean(axis=0)
+        rsi = 100 - (100 / (1 + gain / loss))
+
+        band = packed[-BAND_WINDOW:]
+        sell1 = band.mean(axis=0) + band.std(axis=0, ddof=1) * 2
+        sell2 = np.fmax.reduce(packed[-HIGH_WINDOW:], axis=0)
+
+    result = pd.DataFrame({
+        "Price": packed[-1], "PrevClose": packed[-2] if len(packed) > 1 else np.nan,
+        "EMA50": ema50, "EMA200": ema200, "RSI": rsi, "Sell1": sell1, "Sell2": sell2,
+    }, index=pd.Index(tickers, name="Ticker"))
+
+    short = counts < MIN_BARS
+    if short.any():
+        result.loc[short, INDICATOR_FIELDS] = [DEFAULT_ROW[f] for f in INDICATOR_FIELDS]
+    return result
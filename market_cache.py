@@ -0,0 +1,66 @@
+import threading
+import time
+from collections import OrderedDict
+
+# --- Per-Ticker Market Data Cache ---
+# Entries are keyed by symbol and carry their own timestamp, so a universe
+# change only loads the new symbols. The least recently used entries are
+# evicted once max_size is reached.
+
+
+class TickerCache:
+    def __init__(self, max_size=2000, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_many(self, tickers, loader, is_fresh=None):
+        """Return {ticker: value}, calling loader(missing) once for absent or stale tickers.
+
+        is_fresh(ticker, value) can veto an entry that is still inside its TTL.
+        """
+        now = time.time()
+        found, missing = {}, []
+        with self._lock:
+            for ticker in dict.fromkeys(tickers):
+                entry = self._entries.get(ticker)
+                if (entry is not None and now - entry[0] < self.ttl
+                        and (is_fresh is None or is_fresh(ticker, entry[1]))):
+                    self._entries.move_to_end(ticker)
+                    found[ticker] = entry[1]
+                    self.hits += 1
+                else:
+                    missing.append(ticker)
+                    self.misses += 1
+
+        if missing:
+            loaded = loader(missing)
+            self.put_many(loaded)
+            found.update(loaded)
+        return found
+
+    def put_many(self, values):
+        now = time.time()
+        with self._lock:
+            for ticker, value in values.items():
+                self._entries[ticker] = (now, value)
+                self._entries.move_to_end(ticker)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
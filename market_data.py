@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+from collections import defaultdict
+
+from incremental import IndicatorState, StateStore, states_from_close
+from indicators import DEFAULT_ROW, close_matrix
+from market_cache import TickerCache
+from market_store import download_quotes
+
+# --- Two-Tier Market Data Pipeline ---
+# Tier 1 (snapshots): IndicatorState per ticker over completed daily bars.
+#   Rebuilt only when the quote tier reports a newer session than the snapshot;
+#   a rebuild advances the carried state by the new bars (O(1) per bar) and
+#   only re-seeds tickers that are new or whose history was re-adjusted.
+#   States persist per ticker in DATA_DIR/indicator_state/ between runs; a
+#   rebuild rewrites only the tickers it advanced, seeded or dropped.
+# Tier 2 (quotes): last price + previous close on a short TTL. The live price
+#   is applied as a provisional bar, so EMA/RSI/Bands include today's tick.
+
+QUOTE_TTL = 60
+SNAPSHOT_TTL = 24 * 3600
+# Tickers kept per tier (SNIPER_CACHE_SIZE). Each cache also grows to the
+# largest set requested at once, so a big universe never evicts part of itself
+# and re-syncs it on every background tick.
+CACHE_SIZE = int(os.environ.get("SNIPER_CACHE_SIZE", 10000))
+
+
+class MarketPipeline:
+    def __init__(self, store, quote_ttl=QUOTE_TTL, snapshot_ttl=SNAPSHOT_TTL, max_size=CACHE_SIZE):
+        self.store = store
+        self.quotes = TickerCache(max_size=max_size, ttl=quote_ttl)
+        self.snapshots = TickerCache(max_size=max_size, ttl=snapshot_ttl)
+        self.state_store = StateStore(os.path.join(store.base, "indicator_state"))
+        self.states = self.state_store.load()
+        self._states_lock = threading.Lock()
+        # Cumulative seconds spent per stage, for the diagnostics panel.
+        self.timing = {"quotes": 0.0, "history": 0.0, "indicators": 0.0}
+        self.counters = {"advanced": 0, "seeded": 0}
+
+    def get(self, tickers):
+        """Return {ticker: indicator row}: the daily snapshot advanced by the live quote."""
+        if not tickers:
+            return {}
+        for cache in (self.quotes, self.snapshots):
+            cache.max_size = max(cache.max_size, len(tickers))
+        quotes = self.quotes.get_many(tickers, self._load_quotes)
+
+        def is_fresh(ticker, snap):
+            quote = quotes.get(ticker)
+            return quote is None or (snap["AsOf"] is not None and snap["AsOf"] >= quote["Date"])
+
+        snapshots = self.snapshots.get_many(
+            tickers, lambda missing: self._build_snapshots(missing, quotes), is_fresh
+        )
+
+        market_data = {}
+        for ticker in tickers:
+            snap, quote = snapshots.get(ticker), quotes.get(ticker)
+            if snap is None:
+                row = dict(DEFAULT_ROW)
+            elif quote is not None and snap["AsOf"] is not None:
+                row = snap["State"].provisional(quote["Price"])
+            else:
+                row = snap["State"].values()
+            if quote is not None:
+                row["Price"], row["PrevClose"] = quote["Price"], quote["PrevClose"]
+            market_data[ticker] = row
+        return market_data
+
+    def _load_quotes(self, tickers):
+        t0 = time.perf_counter()
+        try:
+            return download_quotes(self.store.provider, tickers)
+        except Exception:
+            return {}
+        finally:
+            self.timing["quotes"] += time.perf_counter() - t0
+
+    def _build_snapshots(self, tickers, quotes):
+        t0 = time.perf_counter()
+        try:
+            bars = self.store.sync(tickers)
+        except Exception:
+            return {}
+        finally:
+            self.timing["history"] += time.perf_counter() - t0
+
+        # Only bars before the live session go into the snapshot; tickers
+        # without a quote use everything that is stored.
+        t0 = time.perf_counter()
+        snapshots, reseed, changed = {}, defaultdict(list), {}
+        with self._states_lock:
+            for ticker in tickers:
+                quote = quotes.get(ticker)
+                as_of = quote["Date"] if quote else None
+                state = self.states.get(ticker)
+                if state is not None and ticker in bars:
+                    closes = bars[ticker]['Close'].dropna()
+                    if as_of is not None:
+                        closes = closes[closes.index < as_of]
+                if state is not None and ticker in bars and state.can_advance(closes):
+                    advanced = state.advance(closes)
+                    if advanced:
+                        self.counters["advanced"] += advanced
+                        changed[ticker] = state.to_dict()
+                    snapshots[ticker] = {"State": state, "AsOf": as_of}
+                else:
+                    reseed[as_of].append(ticker)
+
+            for as_of, group in reseed.items():
+                close = close_matrix(bars, group)
+                if as_of is not None:
+                    close = close[close.index < as_of]
+                seeded = states_from_close(close)
+                for ticker in group:
+                    # Tickers without usable bars get an empty state (DEFAULT_ROW).
+                    state = seeded.get(ticker, IndicatorState())
+                    if ticker in seeded:
+                        self.states[ticker] = state
+                        self.counters["seeded"] += 1
+                        changed[ticker] = state.to_dict()
+                    elif self.states.pop(ticker, None) is not None:
+                        changed[ticker] = None
+                    snapshots[ticker] = {"State": state, "AsOf": as_of}
+        # Serialized under the lock, written outside it.
+        try:
+            self.state_store.save(changed)
+        except OSError:
+            pass
+        self.timing["indicators"] += time.perf_counter() - t0
+        return snapshots
+
+    def clear_quotes(self):
+        self.quotes.clear()
+
+    def stats(self):
+        return {"quotes": self.quotes.stats(), "snapshots": self.snapshots.stats(),
+                "timing": dict(self.timing), "states": dict(self.counters)}
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from indicators import INDICATOR_FIELDS
+
+# --- Shared Read-Only Market Snapshot ---
+# One column array per indicator field plus a ticker -> row map, held once per
+# process by the refresher. Reruns read it directly: no per-session dict, no
+# pickling, no copies of the universe. Arrays are frozen; an update builds a
+# new snapshot and swaps the reference, so readers always see a consistent one.
+# Money fields stay float64; indicator levels only feed ratios and whole-dollar
+# display, so float32 halves their footprint.
+
+FIELD_DTYPES = {
+    "Price": "float64", "PrevClose": "float64", "EMA50": "float32", "EMA200": "float32",
+    "RSI": "float32", "Sell1": "float32", "Sell2": "float32",
+}
+
+
+class MarketSnapshot:
+    def __init__(self, tickers=(), columns=None, version=0):
+        self.tickers = list(tickers)
+        self.rows = {t: i for i, t in enumerate(self.tickers)}
+        self.version = version
+        self.columns = {}
+        for field in INDICATOR_FIELDS:
+            values = columns[field] if columns is not None else []
+            arr = np.array(values, dtype=FIELD_DTYPES[field])
+            arr.setflags(write=False)
+            self.columns[field] = arr
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __contains__(self, ticker):
+        return ticker in self.rows
+
+    def updated(self, market_data):
+        """New snapshot with {ticker: indicator row} applied on top of this one."""
+        if not market_data:
+            return self
+        new = [t for t in market_data if t not in self.rows]
+        tickers = self.tickers + new
+        rows = {**self.rows, **{t: len(self.tickers) + i for i, t in enumerate(new)}}
+        pos = np.array([rows[t] for t in market_data], dtype=np.intp)
+        columns = {}
+        for field in INDICATOR_FIELDS:
+            arr = np.concatenate([self.columns[field], np.zeros(len(new), dtype=FIELD_DTYPES[field])])
+            arr[pos] = [market_data[t][field] for t in market_data]
+            columns[field] = arr
+        return MarketSnapshot(tickers, columns, self.version + 1)
+
+    def frame(self, tickers=None):
+        """Ticker-indexed float64 frame of `tickers` (all by default); unknown tickers are left out."""
+        if tickers is None:
+            pos = np.arange(len(self.tickers))
+        else:
+            pos = np.array([self.rows[t] for t in tickers if t in self.rows], dtype=np.intp)
+        index = pd.Index([self.tickers[i] for i in pos], dtype="object")
+        return pd.DataFrame({f: self.columns[f][pos].astype("float64") for f in INDICATOR_FIELDS}, index=index)
+
+    def nbytes(self):
+        return sum(arr.nbytes for arr in self.columns.values())
@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+from collections import defaultdict
+
+import pandas as pd
+
+from providers import HISTORY_PERIOD, YFinanceProvider, period_offset
+
+# --- Local OHLCV Bar Store ---
+# One Parquet file per ticker under DATA_DIR/bars. Each refresh only asks the
+# provider for bars after the last stored date instead of the full 2 years.
+# Files keep full OHLCV; memory keeps only the Close column the indicators use.
+# first_bars.json remembers the first bar the provider has for young listings,
+# so back-fills do not re-download history that does not exist.
+
+DATA_DIR = os.environ.get(
+    "SNIPER_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".sniper_data")
+)
+# Relative tolerance when comparing the overlapping bar. A larger gap means the
+# provider re-adjusted history (split/dividend), so the ticker is re-downloaded.
+ADJUST_TOLERANCE = 1e-4
+
+
+def download_quotes(provider, tickers):
+    """Last price, previous close and session date per ticker from a few recent daily bars."""
+    quotes = {}
+    for ticker, bars in provider.download(tickers, period="5d").items():
+        close = bars['Close'].dropna()
+        if len(close) < 2:
+            continue
+        quotes[ticker] = {"Price": close.iloc[-1], "PrevClose": close.iloc[-2], "Date": close.index[-1]}
+    return quotes
+
+
+class BarStore:
+    def __init__(self, root=None, provider=None):
+        self.provider = provider if provider is not None else YFinanceProvider()
+        self.base = root if root is not None else DATA_DIR
+        self.root = os.path.join(self.base, "bars")
+        os.makedirs(self.root, exist_ok=True)
+        self._frames = {}
+        self._lock = threading.Lock()
+        # Bumped on every write, so caches derived from stored history can key on it.
+        self.version = 0
+
+    def _path(self, ticker):
+        return os.path.join(self.root, ticker.replace(os.sep, "_") + ".parquet")
+
+    def _read_file(self, ticker, columns=None):
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return None
+        try:
+            return pd.read_parquet(path, columns=columns)
+        except Exception:
+            return None
+
+    def read(self, ticker):
+        """Stored Close bars (Date-indexed, one "Close" column), cached in memory."""
+        with self._lock:
+            if ticker in self._frames:
+                return self._frames[ticker]
+        df_t = self._read_file(ticker, columns=["Close"])
+        if df_t is None:
+            return None
+        with self._lock:
+            self._frames[ticker] = df_t
+        return df_t
+
+    def write(self, ticker, bars):
+        bars = bars.sort_index()
+        path = self._path(ticker)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        bars.to_parquet(tmp)
+        os.replace(tmp, path)
+        with self._lock:
+            self._frames[ticker] = bars[["Close"]]
+            self.version += 1
+
+    def merge(self, ticker, bars):
+        old = self._read_file(ticker)
+        if old is not None and not old.empty:
+            bars = pd.concat([old[old.index < bars.index[0]], bars])
+            bars = bars[~bars.index.duplicated(keep="last")]
+        self.write(ticker, bars)
+
+    def sync(self, tickers, period=HISTORY_PERIOD):
+        """Bring every ticker up to date and return {ticker: last `period` of Close bars}."""
+        full, by_start = [], defaultdict(list)
+        for ticker in tickers:
+            df_t = self.read(ticker)
+            if df_t is None or len(df_t) < 2:
+                full.append(ticker)
+            else:
+                # Re-fetch the last two stored bars: the newest one may have been
+                # an unfinished session, the older one detects re-adjustment.
+                by_start[df_t.index[-2]].append(ticker)
+
+        for start, group in by_start.items():
+            try:
+                fresh = self.provider.download(group, start=start)
+            except Exception:
+                continue
+            for ticker, bars in fresh.items():
+                old = self.read(ticker)
+                if start in bars.index and not _same_close(old.loc[start, "Close"], bars.loc[start, "Close"]):
+                    full.append(ticker)
+                    continue
+                self.merge(ticker, bars)
+
+        if full:
+            try:
+                fresh = self.provider.download(full, period=period)
+            except Exception:
+                fresh = {}
+            for ticker, bars in fresh.items():
+                self.write(ticker, bars)
+
+        return self.history(tickers, period)
+
+    def _is_short(self, df_t, period):
+        return df_t.index[0] > df_t.index[-1] - period_offset(period) + pd.Timedelta(days=7)
+
+    def backfill(self, tickers, period):
+        """Re-download tickers whose stored bars start well after the beginning of `period`.
+
+        Delta syncs only extend history forward; this is for callers (e.g. the
+        backtest) that need a longer window than the dashboard keeps.
+        """
+        first_bars = self._load_first_bars()
+        short = []
+        for ticker in tickers:
+            df_t = self.read(ticker)
+            if df_t is None or df_t.empty or not self._is_short(df_t, period):
+                continue
+            known = first_bars.get(ticker)
+            if known is None or df_t.index[0] > pd.Timestamp(known):
+                short.append(ticker)
+        if not short:
+            return
+        try:
+            fresh = self.provider.download(short, period=period)
+        except Exception:
+            return
+        for ticker, bars in fresh.items():
+            if bars.empty:
+                continue
+            if bars.index[0] < self.read(ticker).index[0]:
+                self.write(ticker, bars)
+            if self._is_short(bars, period):
+                # The provider has nothing older: a young listing, skipped from now on.
+                first_bars[ticker] = bars.index[0].isoformat()
+        self._save_first_bars(first_bars)
+
+    def _load_first_bars(self):
+        try:
+            with open(os.path.join(self.base, "first_bars.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_first_bars(self, first_bars):
+        path = os.path.join(self.base, "first_bars.json")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(first_bars, f)
+        os.replace(tmp, path)
+
+    def history(self, tickers, period=HISTORY_PERIOD):
+        """Stored Close bars only, no provider calls: {ticker: last `period` of bars}."""
+        history = {}
+        for ticker in tickers:
+            df_t = self.read(ticker)
+            if df_t is not None and not df_t.empty:
+                history[ticker] = df_t[df_t.index > df_t.index[-1] - period_offset(period)]
+        return history
+
+
+def _same_close(old, new):
+    if pd.isna(old) or pd.isna(new):
+        return pd.isna(old) and pd.isna(new)
+    return abs(new - old) <= ADJUST_TOLERANCE * max(abs(old), 1e-12)
@@ -0,0 +1,72 @@
+import json
+import os
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# --- Rerun Stage Timing ---
+# app.py calls timer.lap("<stage>") at the end of each stage; the time since the
+# previous lap is attributed to that stage. Work that happens inside a stage
+# (e.g. indicator computation during fetch) is added with timer.record().
+# The last finished rerun is kept in LAST_RUN so headless benchmarks can read it
+# after AppTest.run(), and appended to SNIPER_PERF_LOG (JSON lines) when set.
+
+LAST_RUN = None
+LOG_PATH = os.environ.get("SNIPER_PERF_LOG")
+
+
+class RunTimer:
+    def __init__(self):
+        self.started = time.time()
+        self.stages = []
+        self.info = {}
+        self._t0 = self._last = time.perf_counter()
+
+    def lap(self, stage, **info):
+        now = time.perf_counter()
+        self.stages.append({"stage": stage, "seconds": now - self._last, **info})
+        self._last = now
+
+    def record(self, stage, seconds, parent=None, **info):
+        self.stages.append({"stage": stage, "seconds": seconds, "parent": parent, **info})
+
+    def total(self):
+        return self._last - self._t0
+
+    def as_dict(self):
+        return {
+            "started": self.started, "total_seconds": self.total(),
+            "max_rss_mb": max_rss_mb(), **self.info, "stages": list(self.stages),
+        }
+
+
+def max_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def publish(timer):
+    global LAST_RUN
+    LAST_RUN = timer.as_dict()
+    if LOG_PATH:
+        try:
+            with open(LOG_PATH, "a") as f:
+                f.write(json.dumps(LAST_RUN, default=str) + "\n")
+        except OSError:
+            pass
+    return LAST_RUN
+
+
+def flatten(runs):
+    """One row per (run, stage), for CSV export."""
+    rows = []
+    for run in runs:
+        run_info = {k: v for k, v in run.items() if k != "stages"}
+        for stage in run["stages"]:
+            rows.append({**run_info, **stage})
+    return rows
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import market_store
+
+# --- Persistent Portfolio Store ---
+# Named books in one SQLite file (SNIPER_DB, default DATA_DIR/sniper.db): cash,
+# transaction lots, watchlist and weekly note per portfolio. Sessions never
+# write back their own copy: update() re-reads the stored book inside a write
+# transaction, applies one edit and bumps the book's version, so concurrent
+# edits from other sessions are kept. Sessions compare versions to notice
+# changes made elsewhere. WAL mode lets many sessions/processes read while one
+# writes.
+
+DEFAULT_PORTFOLIO = "Sniper"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS portfolios (
+    name TEXT PRIMARY KEY,
+    cash REAL NOT NULL DEFAULT 0,
+    note TEXT NOT NULL DEFAULT '',
+    updated REAL NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS lots (
+    portfolio TEXT NOT NULL REFERENCES portfolios(name) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    ticker TEXT NOT NULL,
+    category TEXT NOT NULL,
+    avg_cost REAL NOT NULL,
+    qty REAL NOT NULL,
+    PRIMARY KEY (portfolio, position)
+);
+CREATE TABLE IF NOT EXISTS watchlist (
+    portfolio TEXT NOT NULL REFERENCES portfolios(name) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    ticker TEXT NOT NULL,
+    PRIMARY KEY (portfolio, position)
+);
+"""
+
+
+def book_key(items):
+    """Content hash of a lot list or watchlist; identical books share cached tables."""
+    return hashlib.sha1(json.dumps(items, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class PortfolioStore:
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("SNIPER_DB", os.path.join(market_store.DATA_DIR, "sniper.db"))
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with closing(self._connect()) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+            # Stores created before books were versioned.
+            if "version" not in [col[1] for col in db.execute("PRAGMA table_info(portfolios)")]:
+                db.execute("ALTER TABLE portfolios ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=10)
+        db.execute("PRAGMA foreign_keys=ON")
+        return db
+
+    def names(self):
+        with closing(self._connect()) as db:
+            return [name for (name,) in db.execute("SELECT name FROM portfolios ORDER BY name")]
+
+    def version(self, name):
+        with closing(self._connect()) as db:
+            row = db.execute("SELECT version FROM portfolios WHERE name = ?", (name,)).fetchone()
+        return None if row is None else row[0]
+
+    def load(self, name):
+        """{"portfolio": [lot dicts], "watchlist": [...], "note": str, "cash": float, "version": int}, or None."""
+        with closing(self._connect()) as db:
+            return self._read(db, name)
+
+    def create(self, name, book):
+        """Store `book` under a new name; False if the name is already taken."""
+        with closing(self._connect()) as db, db:
+            cur = db.execute("INSERT OR IGNORE INTO portfolios (name, cash, note, updated) VALUES (?, ?, ?, ?)",
+                             (name, float(book["cash"]), book["note"], time.time()))
+            if cur.rowcount == 0:
+                return False
+            self._write_items(db, name, book)
+        return True
+
+    def update(self, name, change):
+        """Apply change(book) to the stored book in one write transaction and return the book.
+
+        change edits the dict in place; returning False leaves the store untouched
+        (e.g. the edit no longer applies to the current version).
+        """
+        with closing(self._connect()) as db, db:
+            db.execute("BEGIN IMMEDIATE")
+            book = self._read(db, name)
+            if book is None or change(book) is False:
+                return book
+            book["version"] += 1
+            db.execute("UPDATE portfolios SET cash = ?, note = ?, updated = ?, version = ? WHERE name = ?",
+                       (float(book["cash"]), book["note"], time.time(), book["version"], name))
+            self._write_items(db, name, book)
+        return book
+
+    def _read(self, db, name):
+        row = db.execute("SELECT cash, note, version FROM portfolios WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        lots = db.execute("SELECT ticker, category, avg_cost, qty FROM lots WHERE portfolio = ? ORDER BY position",
+                          (name,)).fetchall()
+        watchlist = db.execute("SELECT ticker FROM watchlist WHERE portfolio = ? ORDER BY position", (name,)).fetchall()
+        return {
+            "portfolio": [{"Ticker": t, "Category": c, "Avg Cost": cost, "Qty": qty} for t, c, cost, qty in lots],
+            "watchlist": [t for (t,) in watchlist], "note": row[1], "cash": row[0], "version": row[2],
+        }
+
+    def _write_items(self, db, name, book):
+        db.execute("DELETE FROM lots WHERE portfolio = ?", (name,))
+        db.executemany("INSERT INTO lots VALUES (?, ?, ?, ?, ?, ?)", [
+            (name, i, lot["Ticker"], lot["Category"], float(lot["Avg Cost"]), float(lot["Qty"]))
+            for i, lot in enumerate(book["portfolio"])
+        ])
+        db.execute("DELETE FROM watchlist WHERE portfolio = ?", (name,))
+        db.executemany("INSERT INTO watchlist VALUES (?, ?, ?)", [(name, i, t) for i, t in enumerate(book["watchlist"])])
@@ -0,0 +1,102 @@
+import threading
+import time
+
+from market_data import QUOTE_TTL
+from market_snapshot import MarketSnapshot
+
+# --- Shared Background Refresher ---
+# One process-wide worker keeps the union of all active sessions' tickers warm.
+# Reruns read the last good rows immediately (stale-while-revalidate); only a
+# ticker nobody has loaded yet blocks the caller. Concurrent requests for the
+# same ticker share a single in-flight fetch. Rows are published as one shared
+# MarketSnapshot (see market_snapshot.py) that every session reads in place.
+# Listeners (e.g. the alert engine) get each batch of freshly fetched rows;
+# watched_tickers() is the part of the universe sessions registered as their watchlist.
+
+SESSION_TTL = 300
+
+
+class MarketRefresher:
+    def __init__(self, pipeline, interval=QUOTE_TTL, session_ttl=SESSION_TTL):
+        self.pipeline = pipeline
+        self.interval = interval
+        self.session_ttl = session_ttl
+        self.last_refresh = None
+        self._sessions = {}
+        self.snapshot = MarketSnapshot()
+        self._inflight = {}
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def register(self, session_id, tickers, watched=()):
+        """Mark a session as active with its current universe and make sure the worker runs."""
+        with self._lock:
+            self._sessions[session_id] = (time.time(), list(tickers), list(watched))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="market-refresher", daemon=True)
+                self._thread.start()
+
+    def missing(self, tickers):
+        with self._lock:
+            return [t for t in tickers if t not in self.snapshot]
+
+    def get(self, tickers):
+        """Return the shared snapshot, fetching only tickers never loaded before."""
+        cold = self.missing(tickers)
+        if cold:
+            self.refresh(cold)
+        return self.snapshot
+
+    def refresh(self, tickers):
+        """Fetch tickers through the pipeline, joining any fetch already in flight for them."""
+        done = threading.Event()
+        with self._lock:
+            waits = {self._inflight[t] for t in tickers if t in self._inflight}
+            mine = [t for t in dict.fromkeys(tickers) if t not in self._inflight]
+            for t in mine:
+                self._inflight[t] = done
+        try:
+            rows = self.pipeline.get(mine) if mine else {}
+            with self._lock:
+                # A failed fetch comes back as the zero default row; keep the last good one.
+                good = {t: row for t, row in rows.items() if row.get("Price") or t not in self.snapshot}
+                self.snapshot = self.snapshot.updated(good)
+                if mine:
+                    self.last_refresh = time.time()
+            for listener in list(self.listeners):
+                try:
+                    listener(good)
+                except Exception:
+                    pass
+        finally:
+            with self._lock:
+                for t in mine:
+                    self._inflight.pop(t, None)
+            done.set()
+        for event in waits:
+            event.wait()
+
+    def _active_sessions(self):
+        cutoff = time.time() - self.session_ttl
+        with self._lock:
+            for sid in [s for s, (seen, _, _) in self._sessions.items() if seen < cutoff]:
+                del self._sessions[sid]
+            return list(self._sessions.values())
+
+    def active_tickers(self):
+        return sorted({t for _, tickers, _ in self._active_sessions() for t in tickers})
+
+    def watched_tickers(self):
+        return {t for _, _, watched in self._active_sessions() for t in watched}
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            tickers = self.active_tickers()
+            if not tickers:
+                continue
+            try:
+                self.refresh(tickers)
+            except Exception:
+                pass
@@ -0,0 +1,302 @@
+import os
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# --- Market Data Providers ---
+# Every provider returns {ticker: OHLCV frame} (float64, tz-naive Date index).
+#   YFinanceProvider  - live Yahoo Finance data (default)
+#   ReplayProvider    - recorded Parquet/CSV files, or deterministic synthetic bars
+#   FaultInjector     - wraps another provider with latency and random failures
+#   BatchedProvider   - splits large requests into batches on a thread pool with
+#                       retry/backoff, a rate limit and per-ticker error status
+# provider_from_env() picks one from SNIPER_PROVIDER / SNIPER_REPLAY_DIR /
+# SNIPER_LATENCY / SNIPER_FAILURE_RATE so the dashboard can run offline, and
+# batches it according to SNIPER_BATCH_SIZE / SNIPER_FETCH_WORKERS / SNIPER_RATE_LIMIT.
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+HISTORY_PERIOD = "2y"
+
+
+class ProviderError(Exception):
+    pass
+
+
+def period_offset(period):
+    if period.endswith("mo"):
+        return pd.DateOffset(months=int(period[:-2]))
+    n, unit = int(period[:-1]), period[-1]
+    return pd.DateOffset(years=n) if unit == "y" else pd.DateOffset(days=n)
+
+
+def split_download(df_hist, tickers):
+    """Split a yf.download(group_by='ticker') frame into {ticker: OHLCV frame}."""
+    frames = {}
+    if df_hist is None or df_hist.empty:
+        return frames
+    multi = isinstance(df_hist.columns, pd.MultiIndex)
+    for ticker in tickers:
+        try:
+            df_t = df_hist[ticker] if multi else df_hist
+        except KeyError:
+            continue
+        df_t = df_t[[c for c in FIELDS if c in df_t.columns]].dropna(how="all")
+        if df_t.empty:
+            continue
+        if df_t.index.tz is not None:
+            df_t.index = df_t.index.tz_localize(None)
+        df_t.index.name = "Date"
+        frames[ticker] = df_t.astype("float64")
+    return frames
+
+
+class MarketDataProvider:
+    name = "Unknown"
+
+    def download(self, tickers, start=None, period=HISTORY_PERIOD):
+        """Daily bars from `start` (inclusive) if given, otherwise the last `period`."""
+        raise NotImplementedError
+
+
+class YFinanceProvider(MarketDataProvider):
+    name = "Yahoo Finance"
+
+    def download(self, tickers, start=None, period=HISTORY_PERIOD):
+        import yfinance as yf
+
+        if start is not None:
+            df_hist = yf.download(tickers, start=start.strftime("%Y-%m-%d"), group_by='ticker',
+                                  auto_adjust=True, threads=True, progress=False)
+        else:
+            df_hist = yf.download(tickers, period=period, group_by='ticker',
+                                  auto_adjust=True, threads=True, progress=False)
+        return split_download(df_hist, tickers)
+
+
+class ReplayProvider(MarketDataProvider):
+    """Serves <root>/<TICKER>.parquet or .csv when present, else a synthetic random walk.
+
+    A BarStore directory (DATA_DIR/bars) is a valid recording. Synthetic bars are
+    seeded per ticker, so the same ticker always gets the same history. `end`
+    fixes the replay clock; by default it is today.
+    """
+    name = "Replay"
+
+    def __init__(self, root=None, end=None, n_bars=2600, seed=0):
+        self.root = root
+        self.end = pd.Timestamp(end).normalize() if end is not None else None
+        self.n_bars = n_bars
+        self.seed = seed
+        self._frames = {}
+        self._index = None
+        self._lock = threading.Lock()
+
+    def _load(self, ticker):
+        with self._lock:
+            if ticker in self._frames:
+                return self._frames[ticker]
+        df_t = self._read_recording(ticker)
+        if df_t is None:
+            df_t = self._synthetic(ticker)
+        with self._lock:
+            self._frames[ticker] = df_t
+        return df_t
+
+    def _read_recording(self, ticker):
+        if not self.root:
+            return None
+        base = os.path.join(self.root, ticker.replace(os.sep, "_"))
+        if os.path.exists(base + ".parquet"):
+            df_t = pd.read_parquet(base + ".parquet")
+        elif os.path.exists(base + ".csv"):
+            df_t = pd.read_csv(base + ".csv", index_col=0, parse_dates=True)
+        else:
+            return None
+        df_t.index.name = "Date"
+        return df_t[[c for c in FIELDS if c in df_t.columns]].astype("float64").sort_index()
+
+    def _synthetic(self, ticker):
+        rng = np.random.default_rng([self.seed, zlib.crc32(ticker.encode())])
+        if self._index is None:
+            end = self.end if self.end is not None else pd.Timestamp.today().normalize()
+            self._index = pd.bdate_range(end=end, periods=self.n_bars, name="Date")
+        idx = self._index
+        drift, vol = rng.uniform(-0.0002, 0.001), rng.uniform(0.01, 0.035)
+        close = rng.uniform(20, 500) * np.exp(np.cumsum(rng.normal(drift, vol, self.n_bars)))
+        spread = np.abs(rng.normal(0, vol / 2, self.n_bars))
+        return pd.DataFrame({
+            "Open": close * (1 + rng.normal(0, vol / 4, self.n_bars)),
+            "High": close * (1 + spread), "Low": close * (1 - spread), "Close": close,
+            "Volume": rng.integers(100_000, 50_000_000, self.n_bars).astype("float64"),
+        }, index=idx)
+
+    def download(self, tickers, start=None, period=HISTORY_PERIOD):
+        end = self.end if self.end is not None else pd.Timestamp.today().normalize()
+        frames = {}
+        for ticker in tickers:
+            df_t = self._load(ticker)
+            df_t = df_t[df_t.index <= end]
+            if df_t.empty:
+                continue
+            if start is not None:
+                df_t = df_t[df_t.index >= start]
+            else:
+                df_t = df_t[df_t.index > end - period_offset(period)]
+            if not df_t.empty:
+                frames[ticker] = df_t
+        return frames
+
+
+class FaultInjector(MarketDataProvider):
+    """Adds latency (base + per ticker + jitter) and random failures to another provider."""
+
+    def __init__(self, inner, latency=0.0, per_ticker_latency=0.0, jitter=0.0, failure_rate=0.0, seed=None):
+        self.inner = inner
+        self.name = f"{inner.name} (faults)"
+        self.latency = latency
+        self.per_ticker_latency = per_ticker_latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+
+    def download(self, tickers, start=None, period=HISTORY_PERIOD):
+        time.sleep(self.latency + self.per_ticker_latency * len(tickers) + self._rng.uniform(0, self.jitter))
+        if self._rng.random() < self.failure_rate:
+            raise ProviderError(f"injected failure for {len(tickers)} tickers")
+        return self.inner.download(tickers, start=start, period=period)
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads (rate <= 0 disables)."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class BatchedProvider(MarketDataProvider):
+    """Fetches through `inner` in batches on a bounded thread pool.
+
+    Each batch is retried with exponential backoff; a batch that still fails is
+    split in half until the bad ticker is isolated. Successful tickers are
+    returned even when others fail, and every ticker's last outcome is kept in
+    status() so the UI can show which symbols did not update. After
+    `breaker` consecutive failed calls the upstream is assumed down and calls
+    are skipped for `cooldown` seconds instead of bisecting every batch.
+    """
+
+    def __init__(self, inner, batch_size=100, max_workers=4, retries=3, backoff=0.5, rate=5.0,
+                 breaker=8, cooldown=30.0):
+        self.inner = inner
+        self.name = inner.name
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.limiter = RateLimiter(rate)
+        self.breaker = breaker
+        self.cooldown = cooldown
+        self._failures = 0
+        self._open_until = 0.0
+        self._status = {}
+        self._lock = threading.Lock()
+
+    def download(self, tickers, start=None, period=HISTORY_PERIOD):
+        tickers = list(dict.fromkeys(tickers))
+        batches = [tickers[i:i + self.batch_size] for i in range(0, len(tickers), self.batch_size)]
+        frames = {}
+        if len(batches) == 1:
+            frames.update(self._fetch(batches[0], start, period, self.retries))
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as pool:
+                for part in pool.map(lambda b: self._fetch(b, start, period, self.retries), batches):
+                    frames.update(part)
+        return frames
+
+    def _fetch(self, batch, start, period, attempts):
+        error = None
+        for attempt in range(attempts):
+            if self._circuit_open():
+                error = error or ProviderError("upstream failing, skipped")
+                break
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            self.limiter.wait()
+            try:
+                frames = self.inner.download(batch, start=start, period=period)
+            except Exception as e:
+                error = e
+                self._call_done(ok=False)
+                continue
+            self._call_done(ok=True)
+            self._record(batch, frames)
+            return frames
+
+        if len(batch) > 1 and not self._circuit_open():
+            mid = len(batch) // 2
+            return {**self._fetch(batch[:mid], start, period, 1), **self._fetch(batch[mid:], start, period, 1)}
+        self._record(batch, {}, f"{type(error).__name__}: {error}")
+        return {}
+
+    def _circuit_open(self):
+        return time.monotonic() < self._open_until
+
+    def _call_done(self, ok):
+        with self._lock:
+            if ok:
+                self._failures = 0
+                return
+            self._failures += 1
+            if self._failures >= self.breaker:
+                self._open_until = time.monotonic() + self.cooldown
+                self._failures = 0
+
+    def _record(self, batch, frames, error="no data returned"):
+        now = time.time()
+        with self._lock:
+            for ticker in batch:
+                ok = ticker in frames
+                self._status[ticker] = {"ok": ok, "error": None if ok else error, "time": now}
+
+    def status(self):
+        with self._lock:
+            return dict(self._status)
+
+    def errors(self, tickers=None):
+        """{ticker: error message} for tickers whose last fetch failed."""
+        status = self.status()
+        keys = status if tickers is None else [t for t in tickers if t in status]
+        return {t: status[t]["error"] for t in keys if not status[t]["ok"]}
+
+
+def provider_from_env(environ=os.environ):
+    if environ.get("SNIPER_PROVIDER", "yfinance").lower() == "replay":
+        provider = ReplayProvider(environ.get("SNIPER_REPLAY_DIR"), end=environ.get("SNIPER_REPLAY_END"))
+    else:
+        provider = YFinanceProvider()
+    latency = float(environ.get("SNIPER_LATENCY", 0))
+    failure_rate = float(environ.get("SNIPER_FAILURE_RATE", 0))
+    if latency or failure_rate:
+        provider = FaultInjector(provider, latency=latency, failure_rate=failure_rate)
+    return BatchedProvider(
+        provider,
+        batch_size=int(environ.get("SNIPER_BATCH_SIZE", 100)),
+        max_workers=int(environ.get("SNIPER_FETCH_WORKERS", 4)),
+        rate=float(environ.get("SNIPER_RATE_LIMIT", 5)),
+    )
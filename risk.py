@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from indicators import close_matrix
+
+# --- Portfolio Risk Analytics ---
+# RiskModel holds the expensive statistics of a ticker set: the daily return
+# matrix over the last RISK_WINDOW bars and its covariance / correlation.
+# It only changes with a new daily bar, so callers cache it on the bar store
+# version. Portfolio figures for the current holdings are then one matrix-vector
+# product each (returns @ w, cov @ w), cheap enough for every quote refresh
+# and position edit.
+
+RISK_WINDOW = 252
+MIN_OBSERVATIONS = 60
+TRADING_DAYS = 252
+VAR_LEVEL = 0.95
+# Most tickers shown in the correlation heatmap (holdings first, then watchlist).
+HEATMAP_MAX = 40
+
+
+class RiskModel:
+    def __init__(self, bars, tickers, window=RISK_WINDOW):
+        close = close_matrix(bars, tickers).ffill().iloc[-(window + 1):]
+        returns = close.pct_change().iloc[1:]
+        enough = returns.notna().sum() >= MIN_OBSERVATIONS
+        self.returns = returns.loc[:, enough].fillna(0.0)
+        self.tickers = list(self.returns.columns)
+        self.excluded = [t for t in tickers if t not in self.tickers]
+        self.matrix = self.returns.to_numpy()
+        self.cov = np.cov(self.matrix, rowvar=False, ddof=1).reshape(len(self.tickers), len(self.tickers))
+        std = np.sqrt(np.diag(self.cov))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = self.cov / np.outer(std, std)
+        self.corr = pd.DataFrame(corr, index=self.tickers, columns=self.tickers)
+
+    def weights(self, values, total):
+        """Weight vector aligned with the model from {ticker: position value} over `total`."""
+        w = pd.Series(values, dtype="float64").groupby(level=0).sum().reindex(self.tickers, fill_value=0.0)
+        return w.to_numpy() / total if total else w.to_numpy() * 0.0
+
+
+def portfolio_risk(model, values, total, level=VAR_LEVEL):
+    """Volatility, historical VaR/CVaR and per-ticker risk contribution of the holdings.
+
+    `values` is {ticker: position value}; `total` includes cash, which adds no risk.
+    VaR/CVaR are one-day losses at `level` in the same currency as `total`.
+    """
+    w = model.weights(values, total)
+    cov_w = model.cov @ w
+    variance = float(w @ cov_w)
+    vol = np.sqrt(variance)
+    pnl = model.matrix @ w
+    if len(pnl):
+        cutoff = np.quantile(pnl, 1 - level)
+        var, cvar = -cutoff, -pnl[pnl <= cutoff].mean()
+    else:
+        var = cvar = 0.0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        marginal = np.where(vol > 0, cov_w / vol, 0.0)
+        share = np.where(variance > 0, w * cov_w / variance, 0.0)
+    contributions = pd.DataFrame({
+        "Ticker": model.tickers, "Weight": w, "Marginal Vol": marginal * np.sqrt(TRADING_DAYS),
+        "Risk Share": share,
+    })
+    return {
+        "vol": vol * np.sqrt(TRADING_DAYS), "var": var * total, "cvar": cvar * total, "level": level,
+        "contributions": contributions[contributions['Weight'] != 0].reset_index(drop=True),
+    }
@@ -0,0 +1,81 @@
+"""Headless Sniper screener over a whole ticker universe.
+
+Applies the dashboard's EMA50/EMA200/RSI/Bollinger/52-week levels and the
+watchlist IN ZONE / ALERT / Wait / PROFIT rules to every ticker in a file,
+in chunks spread over a process pool:
+
+    python screener.py sp500.txt --out sniper_scan.parquet
+    python screener.py nasdaq.csv --out scan.csv --workers 8 --chunk 250 --no-sync
+
+The universe file is one ticker per line, or a CSV with a Ticker/Symbol
+column. By default each chunk is first brought up to date in the local bar
+store (SNIPER_DATA_DIR); --no-sync reads the store only. The provider is
+chosen like in the app (SNIPER_PROVIDER etc.).
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from indicators import close_matrix, compute_indicators
+from market_store import BarStore
+from providers import provider_from_env
+from signals import PRB_TIERS, build_watchlist
+
+
+def load_universe(path):
+    if path.lower().endswith(".csv"):
+        df = pd.read_csv(path)
+        col = next((c for c in df.columns if c.strip().lower() in ("ticker", "symbol")), df.columns[0])
+        raw = df[col].astype(str)
+    else:
+        with open(path) as f:
+            raw = [line.split("#")[0] for line in f]
+    tickers = [t.strip().upper() for t in raw if t and t.strip()]
+    return list(dict.fromkeys(tickers))
+
+
+def screen_chunk(tickers, sync=True, data_dir=None):
+    store = BarStore(root=data_dir, provider=provider_from_env())
+    bars = store.sync(tickers) if sync else store.history(tickers)
+    indicators = compute_indicators(close_matrix(bars, tickers))
+    df_scan = build_watchlist(tickers, indicators, PRB_TIERS)
+    df_scan['Bars'] = df_scan['Ticker'].map({t: len(b) for t, b in bars.items()}).fillna(0).astype(int)
+    return df_scan
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("universe", help="ticker list (.txt, one per line) or CSV with a Ticker/Symbol column")
+    parser.add_argument("--out", default="sniper_scan.parquet", help="output .parquet or .csv")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk", type=int, default=250)
+    parser.add_argument("--no-sync", action="store_true", help="use the local bar store only, no downloads")
+    parser.add_argument("--data-dir", default=None, help="bar store root (default SNIPER_DATA_DIR)")
+    args = parser.parse_args(argv)
+
+    tickers = load_universe(args.universe)
+    chunks = [tickers[i:i + args.chunk] for i in range(0, len(tickers), args.chunk)]
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        parts = list(pool.map(screen_chunk, chunks, [not args.no_sync] * len(chunks), [args.data_dir] * len(chunks)))
+    df_scan = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    if not df_scan.empty:
+        df_scan = df_scan.sort_values(by=["Signal", "Diff S1"], ascending=[True, True]).drop(columns=["Display Signal"])
+
+    if args.out.lower().endswith(".csv"):
+        df_scan.to_csv(args.out, index=False)
+    else:
+        df_scan.to_parquet(args.out, index=False)
+
+    elapsed = time.perf_counter() - t0
+    print(f"Screened {len(tickers)} tickers in {elapsed:.1f}s ({len(chunks)} chunks) -> {args.out}", file=sys.stderr)
+    if not df_scan.empty:
+        print(df_scan['Signal'].value_counts().sort_index().to_string(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+from indicators import DEFAULT_ROW, INDICATOR_FIELDS
+
+# --- Vectorized Portfolio & Watchlist Signals ---
+# Holdings and watchlist are joined against a ticker-indexed indicator frame and
+# every derived column is a column expression, so large books build in one pass.
+
+ALERT_BAND = 0.02
+SIGNAL_IN_ZONE = "1. ✅ IN ZONE"
+SIGNAL_ALERT = "2. 🟢 ALERT"
+SIGNAL_WAIT = "3. ➖ Wait"
+SIGNAL_PROFIT = "5. 🔴 PROFIT"
+
+# PRB tier per ticker, shown in the watchlist "Tier" column
+PRB_TIERS = {
+    "NVDA": "S+", "AAPL": "S+", "MSFT": "S+", "GOOGL": "S+", "TSM": "S+", "ASML": "S+",
+    "AMD": "S", "PLTR": "S", "AMZN": "S", "META": "S", "AVGO": "S", "CRWD": "S", "SMH": "S", "QQQ": "ETF",
+    "TSLA": "A+", "V": "A+", "MA": "A+", "LLY": "A+", "JNJ": "A+", "BRK.B": "A+", "PG": "B+", "KO": "B+",
+    "NFLX": "A", "WM": "A", "WMT": "A", "CEG": "A", "NET": "A", "PANW": "A", "SCHD": "A", "CDNS": "S",
+    "ISRG": "B+", "RKLB": "B+", "TMDX": "B+", "IREN": "B+", "MELI": "B+", "ASTS": "B+", "EOSE": "B+",
+    "ADBE": "B", "UBER": "B", "HOOD": "B", "DASH": "B", "BABA": "B", "CRWV": "B", "MU": "B", "PATH": "C",
+    "TTD": "C", "LULU": "C", "CMG": "C", "DUOL": "C", "PDD": "C", "ORCL": "C", "WBD": "Hold",
+    "VOO": "ETF", "QQQM": "ETF"
+}
+
+WATCHLIST_COLUMNS = ["Tier", "Ticker", "Price", "% Day", "Signal", "Diff S1", "RSI", "Upside",
+                     "Buy Lv.1", "Buy Lv.2", "Sell Lv.1", "Sell Lv.2", "Display Signal"]
+
+
+def lookup(market, tickers):
+    """Indicator rows aligned with `tickers`; unknown tickers get DEFAULT_ROW."""
+    rows = market.reindex(tickers)
+    unknown = ~pd.Index(tickers).isin(market.index)
+    if unknown.any():
+        rows.loc[unknown, INDICATOR_FIELDS] = [DEFAULT_ROW[f] for f in INDICATOR_FIELDS]
+    return rows.reset_index(drop=True)
+
+
+def _ratio(num, den, mask, fallback):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(mask, num / den, fallback)
+
+
+def classify(price, diff_s1, sell1, alert_band=ALERT_BAND):
+    """Sniper signal per row: IN ZONE below EMA50, ALERT within alert_band above it, PROFIT at Sell Lv.1."""
+    price, diff_s1, sell1 = np.asarray(price), np.asarray(diff_s1), np.asarray(sell1)
+    return np.select(
+        [(diff_s1 < 0) & (price > 0),
+         (diff_s1 >= 0) & (diff_s1 <= alert_band) & (price > 0),
+         price >= sell1],
+        [SIGNAL_IN_ZONE, SIGNAL_ALERT, SIGNAL_PROFIT],
+        default=SIGNAL_WAIT,
+    )
+
+
+def build_portfolio(portfolio, market):
+    """Section 6 holdings table: prices, P/L, day change and Buy/Sell levels per position."""
+    df = pd.DataFrame(portfolio)
+    if df.empty:
+        return df
+    data = lookup(market, df['Ticker'])
+    price, prev = data['Price'].to_numpy(), data['PrevClose'].to_numpy()
+
+    df['Current Price'] = price
+    df['PrevClose'] = prev
+    df['Value USD'] = df['Qty'] * df['Current Price']
+    df['Total Cost'] = df['Qty'] * df['Avg Cost']
+    df['Total Gain USD'] = df['Value USD'] - df['Total Cost']
+    df['% P/L'] = ((df['Current Price'] - df['Avg Cost']) / df['Avg Cost'])
+    df['Day Change USD'] = (df['Current Price'] - df['PrevClose']) * df['Qty']
+    df['%Day Change'] = ((df['Current Price'] - df['PrevClose']) / df['PrevClose']) if df['PrevClose'].sum() > 0 else 0
+
+    buy1, sell1 = data['EMA50'].to_numpy(), data['Sell1'].to_numpy()
+    df['Buy Lv.1'] = buy1
+    df['Buy Lv.2'] = data['EMA200'].to_numpy()
+    df['Sell Lv.1'] = sell1
+    df['Sell Lv.2'] = data['Sell2'].to_numpy()
+    df['Diff S1'] = _ratio(price - buy1, buy1, buy1 > 0, 0.0)
+    df['Upside'] = _ratio(sell1 - price, price, price > 0, 0.0)
+    return df
+
+
+def build_watchlist(watchlist, market, tiers):
+    """Watchlist table with Signal, sorted by Signal then Diff S1."""
+    tickers = sorted(set(watchlist))
+    if not tickers:
+        return pd.DataFrame()
+    data = lookup(market, tickers)
+    price, prev = data['Price'].to_numpy(), data['PrevClose'].to_numpy()
+    buy1, sell1 = data['EMA50'].to_numpy(), data['Sell1'].to_numpy()
+
+    diff_s1 = _ratio(price - buy1, buy1, buy1 > 0, 9.99)
+    signal = classify(price, diff_s1, sell1)
+    df_watch = pd.DataFrame({
+        "Tier": pd.Series(tickers).map(tiers).fillna("-").to_numpy(), "Ticker": tickers, "Price": price,
+        "% Day": _ratio(price - prev, prev, prev > 0, 0.0), "Signal": signal,
+        "Diff S1": diff_s1, "RSI": data['RSI'].to_numpy(), "Upside": _ratio(sell1 - price, price, price > 0, 0.0),
+        "Buy Lv.1": buy1, "Buy Lv.2": data['EMA200'].to_numpy(),
+        "Sell Lv.1": sell1, "Sell Lv.2": data['Sell2'].to_numpy(),
+        "Display Signal": pd.Series(signal).str.split(". ", n=1, regex=False).str[1],
+    }, columns=WATCHLIST_COLUMNS)
+    return df_watch.sort_values(by=["Signal", "Diff S1"], ascending=[True, True])
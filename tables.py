@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+# --- Table Styling & Paging ---
+# Cell styles are computed once per table as whole CSS columns (np.select)
+# and attached with a single Styler.apply, instead of one Python callback
+# per cell. Paging and signal filters cut the frame down before styling,
+# so only the visible rows are styled and sent to the browser.
+
+GREEN = 'color: #28a745'
+RED = 'color: #dc3545'
+GREEN_BOLD = 'color: #28a745; font-weight: bold;'
+RED_BOLD = 'color: #dc3545; font-weight: bold;'
+LIGHT_GREEN = 'color: #90EE90;'
+RED_SEMI = 'color: #dc3545;'
+TIER_GOLD = 'color: #ffd700; font-weight: bold;'
+TIER_SILVER = 'color: #c0c0c0; font-weight: bold;'
+TIER_BRONZE = 'color: #cd7f32; font-weight: bold;'
+BG_IN_ZONE = 'background-color: rgba(40, 167, 69, 0.4)'
+BG_ALERT = 'background-color: rgba(40, 167, 69, 0.2)'
+BG_PROFIT = 'background-color: rgba(220, 53, 69, 0.2)'
+
+# Auto mode switches from Styler to native column formats above this many rows.
+STYLE_ROW_LIMIT = 500
+PAGE_SIZES = [25, 50, 100, 250, 1000]
+
+HOLDINGS_COLUMNS = ["Ticker", "Qty", "Avg Cost", "Current Price", "% P/L", "Value USD", "Total Gain USD",
+                    "Upside", "Diff S1", "Buy Lv.1", "Sell Lv.1"]
+WATCHLIST_DISPLAY = ["Display Signal", "Tier", "Ticker", "Price", "% Day", "Upside", "Diff S1", "RSI",
+                     "Buy Lv.1", "Buy Lv.2", "Sell Lv.1", "Sell Lv.2"]
+
+
+def format_arrow(val):
+    symbol = "⬆️" if val > 0 else "⬇️" if val < 0 else "➖"
+    return f"{val:+.2%} {symbol}"
+
+
+HOLDINGS_FORMAT = {
+    "Qty": "{:.4f}", "Avg Cost": "${:.2f}", "Total Cost": "${:,.2f}", "Current Price": "${:.2f}",
+    "Diff S1": "{:+.1%}", "% P/L": format_arrow, "Value USD": "${:,.2f}", "Total Gain USD": "${:,.2f}",
+    "Upside": "{:+.1%}", "Buy Lv.1": "${:.0f}", "Sell Lv.1": "${:.0f}"
+}
+WATCHLIST_FORMAT = {
+    "Price": "${:.2f}", "% Day": format_arrow, "Diff S1": "{:+.1%}", "RSI": "{:.0f}", "Upside": "{:+.1%}",
+    "Buy Lv.1": "${:.0f}", "Buy Lv.2": "${:.0f}", "Sell Lv.1": "${:.0f}", "Sell Lv.2": "${:.0f}"
+}
+
+
+def text_colors(values):
+    return np.where(np.asarray(values, dtype="float64") >= 0, GREEN, RED)
+
+
+def diff_s1_colors(values):
+    v = np.asarray(values, dtype="float64")
+    return np.select([v < 0, (v >= 0) & (v <= 0.02)], [GREEN_BOLD, LIGHT_GREEN], default=RED_SEMI)
+
+
+def rsi_colors(values):
+    v = np.asarray(values, dtype="float64")
+    return np.select([v >= 70, v <= 30], [RED_BOLD, GREEN_BOLD], default='')
+
+
+def tier_colors(values):
+    v = pd.Series(values, dtype="object").astype(str)
+    return np.select([v == "S+", v == "S", v.str.contains("A", regex=False)],
+                     [TIER_GOLD, TIER_SILVER, TIER_BRONZE], default='')
+
+
+def signal_backgrounds(signals):
+    s = pd.Series(signals, dtype="object").astype(str)
+    return np.select(
+        [s.str.contains("IN ZONE", regex=False), s.str.contains("ALERT", regex=False),
+         s.str.contains("PROFIT", regex=False)],
+        [BG_IN_ZONE, BG_ALERT, BG_PROFIT], default='')
+
+
+def _join_css(a, b):
+    return np.where((a != '') & (b != ''), np.char.add(np.char.add(a.astype(str), '; '), b.astype(str)),
+                    np.where(a != '', a, b))
+
+
+def holdings_styles(df):
+    styles = pd.DataFrame('', index=df.index, columns=df.columns)
+    for col in ['% P/L', 'Total Gain USD', 'Upside']:
+        styles[col] = text_colors(df[col])
+    styles['Diff S1'] = diff_s1_colors(df['Diff S1'])
+    return styles
+
+
+def watchlist_styles(df):
+    background = signal_backgrounds(df['Signal'])
+    styles = pd.DataFrame(np.repeat(background[:, None], len(df.columns), axis=1),
+                          index=df.index, columns=df.columns)
+    cell = {
+        'Diff S1': diff_s1_colors(df['Diff S1']), 'Tier': tier_colors(df['Tier']),
+        'RSI': rsi_colors(df['RSI']), 'Upside': text_colors(df['Upside']),
+    }
+    for col, css in cell.items():
+        styles[col] = _join_css(background, css)
+    return styles
+
+
+def style_holdings(df):
+    df = df[[c for c in HOLDINGS_COLUMNS if c in df.columns]]
+    return df.style.format({k: v for k, v in HOLDINGS_FORMAT.items() if k in df.columns}) \
+        .apply(lambda _: holdings_styles(df), axis=None)
+
+
+def style_watchlist(df):
+    styles = watchlist_styles(df)
+    df = df[WATCHLIST_DISPLAY]
+    return df.style.format(WATCHLIST_FORMAT).apply(lambda _: styles[WATCHLIST_DISPLAY], axis=None)
+
+
+def use_styler(mode, n_rows):
+    return mode == "Styled" or (mode == "Auto" and n_rows <= STYLE_ROW_LIMIT)
+
+
+def filter_signals(df_watch, displays):
+    if not displays:
+        return df_watch
+    return df_watch[df_watch['Display Signal'].isin(displays)]
+
+
+def page_count(n_rows, page_size):
+    return max(1, -(-n_rows // page_size))
+
+
+def paginate(df, page, page_size):
+    """Rows of the 1-based `page`."""
+    page = min(max(1, page), page_count(len(df), page_size))
+    return df.iloc[(page - 1) * page_size: page * page_size]